@@ -1,11 +1,4 @@
 import streamlit as st
-import pandas as pd
-import folium
-from folium.plugins import HeatMap
-from streamlit_folium import st_folium
-import plotly.express as px
-from PIL import Image
-from utils import PollutionEngine
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -38,8 +31,15 @@ def login_screen():
         st.info("Authorized Personnel: Please enter your Secure Access Token.")
         password = st.text_input("Access Token", type="password")
         if st.button("Authenticate"):
-            if password == st.secrets.get("ADMIN_PASSWORD", "admin"):
+            # DIAGNOSTICS_PASSWORD (optional) signs in as a system admin with the Diagnostics tab
+            diagnostics_password = st.secrets.get("DIAGNOSTICS_PASSWORD")
+            if diagnostics_password and password == diagnostics_password:
+                st.session_state['authenticated'] = True
+                st.session_state['role'] = "admin"
+                st.rerun()
+            elif password == st.secrets.get("ADMIN_PASSWORD", "admin"):
                 st.session_state['authenticated'] = True
+                st.session_state['role'] = "official"
                 st.rerun()
             else:
                 st.error("🚫 Access Denied: Invalid Token")
@@ -49,60 +49,148 @@ if not st.session_state['authenticated']:
     st.stop()
 
 # --- 4. INITIALIZE ENGINE ---
+# Heavy modules are imported past the login gate (and per tab below) so the login screen renders fast
+import pandas as pd
+from utils import CityHub, DEFAULT_CITY_ID
+
+PER_WARD = st.secrets.get("OWM_PER_WARD", False)
+LIVE_POLL_SECONDS = st.secrets.get("LIVE_POLL_SECONDS", 10)   # how often each open dashboard checks for a new snapshot
+FEED_WAIT_SECONDS = 15                                          # longest a page load waits for a city's first snapshot
+
+# One hub per process: every configured city's engine and live snapshot feed are shared by every session
+@st.cache_resource
+def get_hub(owm_key, gemini_key, vision_key, grid_ttl):
+    hub = CityHub(owm_key, gemini_key, vision_key, grid_ttl=grid_ttl)
+    hub.start_feeds(st.secrets.get("FEED_INTERVAL_SECONDS"), per_ward=PER_WARD)
+    return hub
+
 try:
-    engine = PollutionEngine(
+    hub = get_hub(
         st.secrets["OWM_KEY"], 
         st.secrets["GEMINI_KEY"],
-        st.secrets.get("GEMINI_VISION_KEY", st.secrets["GEMINI_KEY"])
+        st.secrets.get("GEMINI_VISION_KEY", st.secrets["GEMINI_KEY"]),
+        st.secrets.get("GRID_TTL_SECONDS", 300)
     )
 except Exception as e:
     st.error(f"🚨 System Error: Credentials Missing. {e}")
     st.stop()
 
 # --- 5. MAIN DASHBOARD ---
+city_ids = list(hub)
 c1, c2 = st.columns([3, 1])
-with c1:
-    st.title("🌍 EcoSense: City Command Center")
-    st.caption("🟢 Live Grid Status: ONLINE | 📡 Source Apportionment: ACTIVE")
 with c2:
+    # Switching city only swaps engines; other cities keep their feeds and refresh on their own
+    city_id = st.selectbox("City", city_ids, index=city_ids.index(DEFAULT_CITY_ID) if DEFAULT_CITY_ID in city_ids else 0,
+                           format_func=lambda c: hub.cities[c].name, key="city", disabled=len(city_ids) < 2)
+    engine = hub[city_id]
+    feed = hub.feeds[city_id]
     if st.button("🔄 Force Satellite Refresh"):
-        st.cache_data.clear()
-        st.rerun()
+        # Pulls fresh readings now; every open dashboard picks up the changed wards on its next poll
+        feed.request_refresh()
+        st.toast("📡 Fresh readings requested")
+with c1:
+    st.title(f"🌍 EcoSense: {engine.city.name} Command Center")
+    st.caption("🟢 Live Grid Status: ONLINE | 📡 Source Apportionment: ACTIVE")
 
-@st.cache_data
-def load_data(): return engine.generate_live_data()
-df = load_data()
+# Shared, read-only snapshot: sessions hold a version number, not their own copy of the grid
+snapshot = feed.current(timeout=FEED_WAIT_SECONDS)
+if snapshot is not None:
+    df = snapshot.grid
+else:
+    # First refresh is slow or failing: build the grid through the engine's cache instead of waiting on the feed
+    try:
+        df = engine.get_live_grid(per_ward=PER_WARD)
+    except Exception as e:
+        st.error(f"🚨 Live grid unavailable: {feed.last_error or e}")
+        st.stop()
 
 # --- TABS ---
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Live Grid (Heatmap)", "📈 Analytics & Safety", "🚨 Action Console", "👁️ Citizen Eye"])
+is_admin = st.session_state.get('role') == "admin"
+tab_names = ["📊 Live Grid (Heatmap)", "📈 Analytics & Safety", "🚨 Action Console", "👁️ Citizen Eye"]
+tab1, tab2, tab3, tab4, *admin_tabs = st.tabs(tab_names + (["🩺 Diagnostics"] if is_admin else []))
 
 # === TAB 1: SENSOR GRID (HEATMAP) ===
 with tab1:
-    k1, k2, k3, k4 = st.columns(4)
-    active = df[df['Status'].str.contains("Online")]
-    avg_aqi = int(df[df['AQI']>0]['AQI'].mean()) if not df.empty else 0
-    k1.metric("City Average AQI", avg_aqi, delta=f"{avg_aqi - 140} vs Baseline", delta_color="inverse")
-    k2.metric("Active Sensors", f"{len(active)}/{len(df)}", "Real-time Monitoring")
-    k3.metric("Primary Pollutant", "PM 2.5", "High Severity")
-    k4.metric("Severe Hotspots", len(df[df['AQI'] > 300]), "Immediate Action", delta_color="inverse")
+    import streamlit.components.v1 as components
+    from streamlit_folium import st_folium
+    from maplayer import base_map, build_map, heat_points, marker_rows, markers_from_rows, VIEWPORT_THRESHOLD
 
-    col_map, col_data = st.columns([2, 1])
-    with col_map:
-        st.subheader("📍 Satellite-Grade Pollution Heatmap")
-        m = folium.Map(location=[26.90, 75.82], zoom_start=12, tiles="CartoDB dark_matter")
-        heat_data = [[row['Lat'], row['Lon'], row['AQI']] for index, row in df.iterrows() if row['AQI'] > 0]
-        HeatMap(heat_data, radius=25, blur=15, gradient={0.4: 'green', 0.65: 'yellow', 0.9: 'red', 1.0: 'purple'}).add_to(m)
-        for _, row in df.iterrows():
-            tooltip_html = f"<div style='font-family:sans-serif;width:150px;'><b>{row['Ward']}</b><br><span style='color:{row['Color']};font-weight:bold;'>AQI: {row['AQI']}</span><br><small>{row['Cause']}</small></div>"
-            color = "#808080" if "Offline" in row['Status'] else row['Color']
-            folium.CircleMarker([row['Lat'], row['Lon']], radius=8, color="white", weight=1, fill=True, fill_color=color, fill_opacity=0.9, popup=folium.Popup(tooltip_html, max_width=200)).add_to(m)
-        st_folium(m, width=None, height=500)
-    with col_data:
-        st.subheader("📋 Zonal Status Report")
-        st.dataframe(df[['Ward', 'AQI', 'Cause', 'Status']], hide_index=True, use_container_width=True, height=500)
+    # Layer data is derived once per city and snapshot version and shared by every session. Only plain
+    # lists are cached: st_folium attaches the marker group to the map it is given, so folium objects
+    # are built fresh on each render and never shared.
+    @st.cache_resource(max_entries=8)
+    def cached_heat(city, version, _df):
+        return heat_points(_df)
+
+    @st.cache_resource(max_entries=8)
+    def cached_marker_rows(city, version, _df):
+        return marker_rows(_df)
+
+    # Small grids read nothing back from the map, so the whole page is rendered once per snapshot
+    # version and every session and rerun reuses the same HTML
+    @st.cache_resource(max_entries=8)
+    def cached_map_html(city, version, _df):
+        view = hub.cities[city]
+        return build_map(_df, view.map_center, zoom_start=view.map_zoom).get_root().render()
+
+    # Rendered on full page runs only; watch_feed() below triggers one when a new snapshot is published
+    def live_grid_panel(city_id):
+        feed = hub.feeds[city_id]
+        snap, delta = feed.changes_since(st.session_state.get(f"seen_version_{city_id}"), timeout=0)
+        if snap is None:
+            st.info(f"⏳ Waiting for the first live snapshot{f' (last attempt failed: {feed.last_error})' if feed.last_error else ''}; this panel updates on its own.")
+            return
+        st.session_state[f"seen_version_{city_id}"] = snap.version
+        grid, summary = snap.grid, snap.summary
+
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric("City Average AQI", summary['avg_aqi'], delta=f"{summary['avg_aqi'] - 140} vs Baseline", delta_color="inverse")
+        k2.metric("Active Sensors", f"{summary['active']}/{summary['total']}", "Real-time Monitoring")
+        k3.metric("Primary Pollutant", "PM 2.5", "High Severity")
+        k4.metric("Severe Hotspots", summary['hotspots'], "Immediate Action", delta_color="inverse")
+        if delta is not None and len(delta):
+            st.caption(f"🔔 Snapshot v{snap.version}: {len(delta)} ward(s) updated at {pd.Timestamp(snap.published_at, unit='s', tz='Asia/Kolkata'):%H:%M:%S}")
+
+        col_map, col_data = st.columns([2, 1])
+        with col_map:
+            st.subheader("📍 Satellite-Grade Pollution Heatmap")
+            if len(grid) > VIEWPORT_THRESHOLD:
+                # Large grids: only markers inside the last viewport are sent, so the bounds are read back.
+                # Panning reruns the page with the same snapshot, so the heatmap script is unchanged and
+                # the component keeps the map and only swaps the marker group
+                view = hub.cities[city_id]
+                bounds = (st.session_state.get(f"grid_map_{city_id}") or {}).get("bounds") or {}
+                sw, ne = bounds.get("_southWest"), bounds.get("_northEast")
+                rows = marker_rows(engine.sensors_in_view(grid, sw["lat"], sw["lng"], ne["lat"], ne["lng"])) if sw and ne else cached_marker_rows(city_id, snap.version, grid)
+                with engine.metrics.timer("step", step="map_build"):
+                    m = base_map(cached_heat(city_id, snap.version, grid), view.map_center, zoom_start=view.map_zoom)
+                    layer = markers_from_rows(rows)
+                with engine.metrics.timer("step", step="map_render"):
+                    st_folium(m, width=None, height=500, feature_group_to_add=layer, returned_objects=["bounds"], key=f"grid_map_{city_id}")
+            else:
+                with engine.metrics.timer("step", step="map_build"):
+                    html = cached_map_html(city_id, snap.version, grid)
+                with engine.metrics.timer("step", step="map_render"):
+                    components.html(html, height=500)
+        with col_data:
+            st.subheader("📋 Zonal Status Report")
+            if delta is not None and len(delta):
+                st.dataframe(delta[['Ward', 'Prev AQI', 'AQI', 'Cause']], hide_index=True, use_container_width=True)
+            st.dataframe(grid[['Ward', 'AQI', 'Cause', 'Status']], hide_index=True, use_container_width=True, height=500)
+
+    # The only part that reruns on a timer: a version check that is cheap for every open session
+    @st.fragment(run_every=LIVE_POLL_SECONDS)
+    def watch_feed(city_id):
+        snap = hub.feeds[city_id].current(timeout=0)
+        if snap is not None and snap.version != st.session_state.get(f"seen_version_{city_id}"):
+            st.rerun()
+
+    live_grid_panel(city_id)
+    watch_feed(city_id)
 
 # === TAB 2: ANALYTICS ===
 with tab2:
+    import plotly.express as px
     st.subheader("📉 Pollutant Analysis vs Safety Standards")
     clean_df = df[df['AQI'] > 0]
     fig = px.bar(clean_df, x='Ward', y=['PM2.5', 'NO2'], barmode='group', title="Pollutant Levels vs WHO/CPCB Limits", color_discrete_sequence=['#00CC96', '#EF553B'])
@@ -110,9 +198,17 @@ with tab2:
     fig.add_hline(y=80, line_dash="dash", line_color="#FFA500", annotation_text="NO2 Limit (80)")
     st.plotly_chart(fig, use_container_width=True)
     st.subheader("⏳ 24-Hour Forecast Trend")
-    sel_ward = st.selectbox("Select Ward for Trend:", clean_df['Ward'].unique())
-    history_df = engine.generate_historical_trends(sel_ward)
-    fig_line = px.area(history_df, x='Time', y='AQI', title=f"Predicted Trend: {sel_ward}", markers=True, color_discrete_sequence=['#AB63FA'])
+    c_ward, c_window = st.columns([2, 1])
+    sel_ward = c_ward.selectbox("Select Ward for Trend:", clean_df['Ward'].unique())
+    window = c_window.radio("Window", ["24 Hours", "7 Days", "30 Days"], horizontal=True)
+    hours, resolution = {"24 Hours": (24, "hour"), "7 Days": (168, "hour"), "30 Days": (720, "day")}[window]
+    history_df = engine.generate_historical_trends(sel_ward, hours=hours, resolution=resolution)
+    forecast_df = engine.forecast_all(24)
+    trend_df = pd.concat([
+        history_df[['Time', 'AQI']].assign(Series="Observed"),
+        forecast_df[forecast_df['Ward'] == sel_ward][['Time', 'AQI']].assign(Series="Forecast"),
+    ], ignore_index=True)
+    fig_line = px.line(trend_df, x='Time', y='AQI', color='Series', title=f"Observed & Predicted Trend: {sel_ward}", markers=True, color_discrete_sequence=['#AB63FA', '#00CC96'])
     st.plotly_chart(fig_line, use_container_width=True)
 
 # === TAB 3: ACTION CONSOLE (MATH + COST UPGRADE) ===
@@ -149,6 +245,11 @@ with tab3:
         st.divider()
         st.markdown("#### 🛠️ 'What-If' Predictive Simulation")
         st.info("Select policies to run Monte Carlo AQI projection and Budget Analysis.")
+        packages = engine.recommend_policy_packages(df)
+        if target in packages.index:
+            best = packages.loc[target]
+            goal = "reaches target" if best['Meets Target'] else "best achievable"
+            st.caption(f"💡 Suggested package ({goal}): **{best['Package']}** → AQI {best['Predicted AQI']} at ₹{best['Daily Cost (₹)']:,}/day")
         
         c_sim1, c_sim2, c_sim3 = st.columns(3)
         active_policies = []
@@ -162,13 +263,15 @@ with tab3:
         
         if active_policies:
             # Calls the Engine with Cost Data
-            pred, math_df, forecast_df, cost_df = engine.simulate_policy_impact(w_dat['AQI'], w_dat['NO2'], w_dat['Type'], active_policies)
+            pred, math_df, forecast_df, cost_df = engine.simulate_policy_impact(w_dat['AQI'], w_dat['NO2'], w_dat['Type'], active_policies, ward_name=target)
             
+            # pred is the Day 1 median (P50) of the Monte Carlo run plotted below
             improvement = w_dat['AQI'] - pred
-            st.success(f"📉 Prediction: AQI will drop by {improvement} points.")
+            day1 = forecast_df.iloc[0]
+            st.success(f"📉 Prediction (median): AQI will drop by {improvement} points (P5–P95: {day1['P5']}–{day1['P95']}).")
             
             c_res1, c_res2 = st.columns(2)
-            c_res1.metric("Predicted New AQI", pred, f"-{improvement}", delta_color="normal")
+            c_res1.metric("Predicted New AQI (P50)", pred, f"-{improvement}", delta_color="normal")
             
             # --- FINANCIAL & MATH SECTION ---
             with st.expander("💸 Financial Impact & Resource Allocation", expanded=True):
@@ -196,19 +299,18 @@ with tab3:
                     # Access by position (last row, last column) to avoid name errors
                     total_cost = str(cost_df.iloc[-1, -1]).replace('<b>', '').replace('</b>', '')
                     
-                    with st.spinner("Gemini Finance Engine is auditing the budget..."):
-                        # Call the AI function from utils.py
-                        audit_report = engine.generate_ai_budget_report(active_policies, w_dat, total_cost)
-                        st.markdown("##### 🧾 AI Budget Auditor Report")
-                        st.info(audit_report)
+                    st.markdown("##### 🧾 AI Budget Auditor Report")
+                    # Streamed from utils.py so the first tokens show up immediately
+                    with st.container(border=True):
+                        st.write_stream(engine.stream_ai_budget_report(active_policies, w_dat, total_cost))
 
             with st.expander("📊 View Mathematical Model", expanded=False):
-                st.markdown("##### 1. Calculation Formula")
+                st.markdown("##### 1. Nominal Formula (full compliance)")
                 st.latex(r'''AQI_{final} = AQI_{current} - \sum (AQI_{current} \times \alpha_{policy})''')
                 st.markdown("##### 2. Statistical Impact Breakdown")
                 st.dataframe(math_df, hide_index=True, use_container_width=True)
                 st.markdown("##### 3. 3-Day Projected Sustainment")
-                fig_forecast = px.line(forecast_df, x="Day", y="Predicted AQI", markers=True, title="Projected Impact Decay Curve")
+                fig_forecast = px.line(forecast_df, x="Day", y=["P5", "Predicted AQI", "P95"], markers=True, title="Projected Impact Decay Curve (P5 / Median / P95)")
                 fig_forecast.update_layout(height=250)
                 st.plotly_chart(fig_forecast, use_container_width=True)
         else:
@@ -216,16 +318,23 @@ with tab3:
 
         st.divider()
         st.caption("Official Orders")
-        col_type, col_lang, col_go = st.columns([2, 1, 1])
+        col_type, col_lang, col_go, col_all = st.columns([2, 1, 1, 1])
         rtype = col_type.selectbox("Doc Type", ["Public Health Advisory", "Industrial Notice", "Traffic Order"])
         lang = col_lang.radio("Language", ["English", "Hindi"], horizontal=True)
+        cat_map = {"Public Health Advisory": "Public", "Industrial Notice": "Industrial", "Traffic Order": "Traffic"}
         
         if col_go.button("Draft"):
-            cat_map = {"Public Health Advisory": "Public", "Industrial Notice": "Industrial", "Traffic Order": "Traffic"}
-            with st.spinner(f"AI Drafting in {lang}..."):
-                doc = engine.generate_segmented_report(w_dat, cat_map[rtype], lang)
-                st.success(f"📄 Generated: {rtype}")
-                st.code(doc, language='markdown')
+            st.success(f"📄 Drafting: {rtype} ({lang})")
+            with st.container(border=True):
+                st.write_stream(engine.stream_segmented_report(w_dat, cat_map[rtype], lang))
+
+        if col_all.button("Draft All"):
+            with st.spinner("AI Drafting all orders in English & Hindi..."):
+                docs = engine.draft_reports_parallel(w_dat)
+            for (cat, doc_lang), doc in docs.items():
+                label = next(k for k, v in cat_map.items() if v == cat)
+                with st.expander(f"📄 {label} ({doc_lang})"):
+                    st.code(doc, language='markdown')
 # === TAB 4: CITIZEN EYE (VISION AI) ===
 with tab4:
     st.header("👁️ Citizen Sentinel (AI Vision)")
@@ -234,23 +343,78 @@ with tab4:
     with col_input:
         tab_cam, tab_upl = st.tabs(["📸 Camera", "📂 Upload"])
         final_image = None
+        batch_images = []
         with tab_cam:
             cam_img = st.camera_input("Capture Site Evidence")
-            if cam_img: final_image = Image.open(cam_img)
+            if cam_img:
+                from PIL import Image
+                final_image = Image.open(cam_img)
         with tab_upl:
-            upl_img = st.file_uploader("Upload Image", type=["jpg", "png", "jpeg"])
-            if upl_img: final_image = Image.open(upl_img)
+            upl_imgs = st.file_uploader("Upload Image(s)", type=["jpg", "png", "jpeg"], accept_multiple_files=True)
+            if upl_imgs:
+                from PIL import Image
+                if len(upl_imgs) == 1:
+                    final_image = Image.open(upl_imgs[0])
+                else:
+                    batch_images = [(f.name, Image.open(f)) for f in upl_imgs]
+        st.caption("📍 Report Location (used when the photo has no GPS tag)")
+        c_lat, c_lon = st.columns(2)
+        rep_lat = c_lat.number_input("Latitude", value=float(engine.city.center['lat']), format="%.4f", key=f"rep_lat_{city_id}")
+        rep_lon = c_lon.number_input("Longitude", value=float(engine.city.center['lon']), format="%.4f", key=f"rep_lon_{city_id}")
+        route = engine.route_citizen_report(rep_lat, rep_lon)
+        est_aqi = engine.interpolate_aqi(df, [rep_lat], [rep_lon])[0]
+        st.info(f"Routed to **{route['Ward']}** ({route['Distance (km)']} km) → 👮 {route['Officer']['Name']} ({route['Officer']['Unit']})"
+                + (f" | Est. local AQI: {int(est_aqi)}" if est_aqi == est_aqi else ""))
     with col_analysis:
-        if final_image:
+        if batch_images:
+            st.write(f"🗂️ {len(batch_images)} images queued")
+            if st.button("🚀 Run Batch Vision Analysis"):
+                with st.spinner("Scanning images (near-duplicates are analysed once)..."):
+                    reports = engine.analyze_images_batch([img for _, img in batch_images])
+                st.success("Batch Analysis Complete")
+                for (name, _), rep in zip(batch_images, reports):
+                    ward = rep["Route"]["Ward"] if "Route" in rep else route["Ward"]
+                    with st.expander(f"{name} → {ward}" + (" (duplicate)" if rep["Duplicate"] else "")):
+                        st.write(rep["Analysis"])
+        elif final_image:
             st.image(final_image, caption="Evidence for Analysis", width=400)
             if st.button("🚀 Run Gemini Vision Analysis"):
                 with st.spinner("Scanning image for pollution sources..."):
-                    result = engine.analyze_uploaded_image(final_image)
-                    st.success("Analysis Complete")
-                    st.write(result)
+                    rep = engine.analyze_citizen_report(final_image)
+                    st.success("Analysis Complete" + (" (matched a recent report)" if rep["Duplicate"] else ""))
+                    if "Route" in rep:
+                        st.caption(f"📍 GPS tag → {rep['Route']['Ward']} | 👮 {rep['Route']['Officer']['Name']}")
+                    st.write(rep["Analysis"])
         else:
             st.info("Waiting for image input...")
 
+# === TAB 5: DIAGNOSTICS (ADMIN ONLY) ===
+if is_admin:
+    with admin_tabs[0]:
+        st.header("🩺 Engine Diagnostics")
+        metrics = engine.metrics
+        st.caption(f"In-process metrics since {pd.Timestamp(metrics.started, unit='s', tz='Asia/Kolkata'):%d %b %H:%M:%S} (this server process only)")
+        summary = pd.DataFrame(metrics.summary())
+        if summary.empty:
+            st.info("No calls recorded yet.")
+        else:
+            timings = summary[summary['type'] == "histogram"].copy()
+            seconds = timings['metric'].str.endswith("_seconds")
+            for col in ["mean", "p50", "p95", "p99"]:
+                timings.loc[seconds, col] = timings.loc[seconds, col] * 1000
+            timings['unit'] = seconds.map({True: "ms", False: "bytes"})
+            st.subheader("⏱️ Latency & Payload Sizes")
+            st.dataframe(timings[['metric', 'labels', 'count', 'unit', 'mean', 'p50', 'p95', 'p99']].sort_values("count", ascending=False),
+                         hide_index=True, use_container_width=True, column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ["mean", "p50", "p95", "p99"]})
+            st.subheader("🔁 Cache Hits, Fallbacks & Errors")
+            st.dataframe(summary[summary['type'] == "counter"][['metric', 'labels', 'count']], hide_index=True, use_container_width=True)
+        c_prom, c_json, c_reset = st.columns(3)
+        c_prom.download_button("⬇️ Prometheus (text)", metrics.to_prometheus(), file_name="ecosense_metrics.prom", mime="text/plain")
+        c_json.download_button("⬇️ JSON Lines", metrics.to_jsonl(), file_name="ecosense_metrics.jsonl", mime="application/x-ndjson")
+        if c_reset.button("♻️ Reset Counters"):
+            metrics.reset()
+            st.rerun()
+
 # --- FOOTER ---
 st.markdown("---")
 st.caption("Jaipur Smart City Hackathon 2026 | Powered by **TeamAR27** | Secured Connection")
\ No newline at end of file
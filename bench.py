@@ -0,0 +1,372 @@
+"""
+Benchmarks for the engine's hot paths, run against local stand-ins for OpenWeatherMap and Gemini
+so results are reproducible and never touch the network. Every benchmark is repeated for each
+ward count and reports throughput, min/p50/p99 latency and peak traced memory; results are compared
+against a stored baseline and the run exits non-zero on a regression that stands out from the noise.
+
+    python bench.py                                   # 10 / 100 / 1000 / 10000 wards vs bench_baseline.json
+    python bench.py --wards 10 1000 --owm-latency 0.05 --owm-failure-rate 0.2
+    python bench.py --save-baseline                   # record this machine's numbers as the baseline
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+import maplayer
+from utils import PollutionEngine, CityConfig, CITIES, DEFAULT_CITY_ID
+
+# --- BENCHMARK SETTINGS ---
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_WARD_COUNTS = [10, 100, 1000, 10000]
+DEFAULT_REPEATS = 20
+TIME_BUDGET_SECONDS = 5.0     # per benchmark and ward count; at least MIN_SAMPLES runs regardless
+MIN_SAMPLES = 5               # also a floor under --repeats: fewer samples make min and p50 meaningless
+HISTORY_WARDS = 50            # wards given HISTORY_HOURS of stored readings before the trend benchmark
+HISTORY_HOURS = 48
+LATENCY_TOLERANCE = 0.25      # min and p50 may both be this much slower than the baseline...
+LATENCY_FLOOR_MS = 2.0        # ...plus the larger of this absolute slack
+NOISE_MADS = 3                # ...and this many of the baseline's median absolute deviations, before it counts
+MEMORY_TOLERANCE = 0.25
+CITY_CENTER = [26.90, 75.82]
+BENCH_SEED = 2026
+
+
+# --- FAKE OPENWEATHERMAP ---
+class FakeOWMServer(ThreadingHTTPServer):
+    """Local /data/2.5/air_pollution endpoint with a fixed latency and a random failure rate."""
+    daemon_threads = True
+
+    def __init__(self, latency=0.02, failure_rate=0.0, seed=BENCH_SEED):
+        super().__init__(("127.0.0.1", 0), _OWMHandler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/data/2.5/air_pollution"
+
+    def roll(self):
+        with self._rng_lock:
+            self.requests += 1
+            return self._rng.random()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _OWMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, like the real API behind the pooled session
+
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        if server.roll() < server.failure_rate:
+            self._send(503, {"cod": 503, "message": "fake outage"})
+            return
+        query = parse_qs(urlparse(self.path).query)
+        lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        # Deterministic per coordinate, so repeated runs see the same readings
+        level = int(abs(lat * 1000 + lon * 100)) % 5 + 1
+        self._send(200, {"list": [{
+            "main": {"aqi": level},
+            "components": {"pm2_5": 20.0 * level, "no2": 12.0 * level, "o3": 25.0},
+        }]})
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+# --- FAKE GEMINI ---
+class FakeGenAI:
+    """Drop-in for the google.generativeai module surface the engine uses."""
+    def __init__(self, latency=0.05, failure_rate=0.0, chunks=8, seed=BENCH_SEED):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.chunks = chunks
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            failed = self._rng.random() < self.failure_rate
+        time.sleep(self.latency)
+        if failed:
+            raise RuntimeError("503 fake upstream unavailable")
+
+    def configure(self, api_key=None):
+        pass
+
+    def list_models(self):
+        self._call()
+        return [_FakeModelInfo("models/gemini-1.0-pro"), _FakeModelInfo("models/gemini-1.5-flash")]
+
+    def GenerativeModel(self, name):
+        return _FakeModel(self, name)
+
+
+class _FakeModelInfo:
+    def __init__(self, name):
+        self.name = name
+        self.supported_generation_methods = ["generateContent"]
+
+
+class _FakeText:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def generate_content(self, content, stream=False):
+        self.client._call()
+        prompt = content if isinstance(content, str) else content[0]
+        text = f"[{self.name}] " + " ".join(prompt.split()[:40])
+        if not stream:
+            return _FakeText(text)
+        step = max(1, len(text) // self.client.chunks)
+        return [_FakeText(text[i:i + step]) for i in range(0, len(text), step)]
+
+
+# --- SYNTHETIC CITY ---
+def synthetic_city(n, seed=BENCH_SEED):
+    """The default city's officers and policies with n wards scattered around it."""
+    base = CITIES[DEFAULT_CITY_ID]
+    return CityConfig("bench", f"Bench ({n} wards)", base.center, CITY_CENTER, 12,
+                      synthetic_wards(n, seed), base.officers, base.policies)
+
+
+def synthetic_wards(n, seed=BENCH_SEED):
+    """n wards scattered around Jaipur, cycling through the real ward types and densities."""
+    rng = np.random.default_rng(seed)
+    templates = list(CITIES[DEFAULT_CITY_ID].wards.values())
+    lat = CITY_CENTER[0] + rng.uniform(-0.15, 0.15, n)
+    lon = CITY_CENTER[1] + rng.uniform(-0.15, 0.15, n)
+    risk = rng.uniform(0.4, 1.9, n)
+    return {
+        f"Ward {i:05d}": {
+            "lat": float(lat[i]), "lon": float(lon[i]), "type": templates[i % len(templates)]["type"],
+            "risk_factor": float(risk[i]), "pop_density": templates[i % len(templates)]["pop_density"],
+        }
+        for i in range(n)
+    }
+
+
+# --- BENCHMARKS ---
+def _benchmarks(engine, grid):
+    """name -> zero-argument callable; each call is one timed operation."""
+    online = grid[grid["AQI"] > 0]
+    sample = online.iloc[len(online) // 2]
+    no2, pm25 = grid["NO2"].tolist(), grid["PM2.5"].tolist()
+    types, hour = grid["Type"].astype(str).tolist(), 9
+    history_wards = grid["Ward"].head(HISTORY_WARDS).tolist()
+    prompts = iter(range(10 ** 9))
+
+    def live_grid():
+        engine.cache.invalidate("baseline")
+        return engine.generate_live_data()
+
+    def live_grid_per_ward():
+        engine.cache.invalidate("baseline", "ward_readings")
+        return engine.generate_live_data(per_ward=True)
+
+    def cause_scalar():
+        # The old per-row path: one _calculate_cause call per ward
+        return [engine._calculate_cause(a, b, t, hour) for a, b, t in zip(no2, pm25, types)]
+
+    def cause_vectorized():
+        return engine.cause_rules.attribute(grid["NO2"].to_numpy(), grid["PM2.5"].to_numpy(), grid["Type"].array, hour)
+
+    def policy_impact():
+        return engine.simulate_policy_impact(int(sample["AQI"]), int(sample["NO2"]), str(sample["Type"]), list(engine.policy_table.keys), sample["Ward"])
+
+    def policy_optimize():
+        return engine.optimize_policies(grid)
+
+    def historical_trends():
+        return engine.generate_historical_trends(random.choice(history_wards), hours=HISTORY_HOURS)
+
+    def map_build():
+        # Tab 1 renders the folium map to HTML on every rerun without a cached map
+        return maplayer.build_map(grid, CITY_CENTER).get_root().render()
+
+    def llm_uncached():
+        return engine.generate_segmented_report({"Ward": f"{sample['Ward']} #{next(prompts)}", "Type": sample["Type"], "AQI": sample["AQI"]}, "Public")
+
+    def llm_cached():
+        return engine.generate_segmented_report({"Ward": sample["Ward"], "Type": sample["Type"], "AQI": sample["AQI"]}, "Public")
+
+    def llm_stream():
+        return "".join(engine.stream_segmented_report({"Ward": f"{sample['Ward']} #{next(prompts)}", "Type": sample["Type"], "AQI": sample["AQI"]}, "Traffic"))
+
+    def model_discovery():
+        return engine._get_working_model_name()
+
+    return {
+        "live_grid": live_grid, "live_grid_per_ward": live_grid_per_ward,
+        "cause_scalar": cause_scalar, "cause_vectorized": cause_vectorized,
+        "policy_impact": policy_impact, "policy_optimize": policy_optimize,
+        "historical_trends": historical_trends, "map_build": map_build,
+        "llm_uncached": llm_uncached, "llm_cached": llm_cached, "llm_stream": llm_stream,
+        "model_discovery": model_discovery,
+    }
+
+
+def measure(fn, repeats=DEFAULT_REPEATS, budget=TIME_BUDGET_SECONDS):
+    fn()    # warm-up: imports, pools, first-touch caches
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < MIN_SAMPLES or (len(samples) < repeats and time.perf_counter() - started < budget):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    # Peak memory from a separate traced run, so tracing overhead stays out of the timings
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    samples = np.array(samples) * 1000
+    p50 = float(np.percentile(samples, 50))
+    return {
+        "samples": len(samples),
+        "ops_per_s": round(1000 / samples.mean(), 2),
+        "min_ms": round(float(samples.min()), 3),
+        "p50_ms": round(p50, 3),
+        "mad_ms": round(float(np.median(np.abs(samples - p50))), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def run_suite(ward_counts, selected=None, repeats=DEFAULT_REPEATS, budget=TIME_BUDGET_SECONDS,
+              owm_latency=0.02, owm_failure_rate=0.05, llm_latency=0.05, llm_failure_rate=0.05):
+    results = {}
+    with FakeOWMServer(owm_latency, owm_failure_rate) as owm:
+        for n in ward_counts:
+            with tempfile.TemporaryDirectory(prefix="ecosense-bench-") as data_dir:
+                random.seed(BENCH_SEED)
+                engine = PollutionEngine("bench-owm", "bench-gemini", city=synthetic_city(n),
+                                         data_dir=data_dir, owm_url=owm.url,
+                                         genai_client=FakeGenAI(llm_latency, llm_failure_rate))
+                engine.rng = np.random.default_rng(BENCH_SEED)
+                grid = engine.generate_live_data()
+                now = int(time.time())
+                history = grid.head(HISTORY_WARDS)
+                for h in range(HISTORY_HOURS, 0, -1):
+                    engine.store.append_snapshot(history, when=now - h * 3600)
+                for name, fn in _benchmarks(engine, grid).items():
+                    if selected and name not in selected:
+                        continue
+                    stats = measure(fn, repeats, budget)
+                    results[f"{name}@{n}"] = stats
+                    print(f"{name:<20}{n:>7} wards  {stats['ops_per_s']:>10.2f} ops/s  min {stats['min_ms']:>10.3f} ms  p50 {stats['p50_ms']:>10.3f} ms  "
+                          f"p99 {stats['p99_ms']:>10.3f} ms  peak {stats['peak_kb']:>10.1f} KB", flush=True)
+                engine.monte_carlo.shutdown()
+                engine._fetch_pool.shutdown(wait=False, cancel_futures=True)
+                engine._llm_pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def compare(results, baseline, latency_tolerance=LATENCY_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """
+    Human-readable regression lines; empty when everything is within tolerance. A slowdown counts
+    only if the fastest run and the median both moved past the tolerance plus a noise margin:
+    a busy machine inflates the median of a ms-scale benchmark, but rarely its minimum.
+    """
+    regressions = []
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        slack = max(LATENCY_FLOOR_MS, NOISE_MADS * base.get("mad_ms", 0.0))
+        base_min = base.get("min_ms", base["p50_ms"])
+        slow_min = stats["min_ms"] > base_min * (1 + latency_tolerance) + slack
+        slow_p50 = stats["p50_ms"] > base["p50_ms"] * (1 + latency_tolerance) + slack
+        if slow_min and slow_p50:
+            regressions.append(f"{key}: min {stats['min_ms']:.3f} / p50 {stats['p50_ms']:.3f} ms vs baseline "
+                               f"{base_min:.3f} / {base['p50_ms']:.3f} ms (slack {slack:.3f} ms)")
+        if stats["peak_kb"] > base["peak_kb"] * (1 + memory_tolerance) + 64:
+            regressions.append(f"{key}: peak {stats['peak_kb']:.1f} KB vs baseline {base['peak_kb']:.1f} KB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EcoSense against local OWM and Gemini stand-ins.")
+    parser.add_argument("--wards", type=int, nargs="+", default=DEFAULT_WARD_COUNTS, help="ward counts to run")
+    parser.add_argument("--only", nargs="+", default=None, help="benchmark names to run (default: all)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET_SECONDS, help="seconds per benchmark and ward count")
+    parser.add_argument("--owm-latency", type=float, default=0.02, help="seconds per fake OWM response")
+    parser.add_argument("--owm-failure-rate", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake Gemini call")
+    parser.add_argument("--llm-failure-rate", type=float, default=0.05)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=LATENCY_TOLERANCE, help="allowed relative slowdown of min and p50")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args(argv)
+    # folium warns about the CartoDB tile key on every map it builds
+    warnings.filterwarnings("ignore", message="CartoDB tiles")
+
+    results = run_suite(args.wards, args.only, args.repeats, args.budget,
+                        args.owm_latency, args.owm_failure_rate, args.llm_latency, args.llm_failure_rate)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(baseline.items())), f, indent=2)
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), latency_tolerance=args.tolerance)
+    for line in regressions:
+        print(f"⚠️ Regression {line}")
+    if not regressions:
+        print("✅ No regressions against the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# --- SNAPSHOT FEED ---
+FEED_HISTORY = 20                                          # published versions kept for delta lookups
+FEED_RETRY_SECONDS = 15                                    # wait after a failed refresh, if shorter than the interval
+DELTA_COLUMNS = ["AQI", "PM2.5", "NO2", "Status", "Cause"]   # a ward counts as changed if any of these differ
+HOTSPOT_AQI = 300
+
+log = logging.getLogger("ecosense")
+
+
+class Snapshot:
+    """One published grid. The DataFrame is shared by every session and must be treated as read-only."""
+    __slots__ = ("version", "grid", "summary", "published_at")
+
+    def __init__(self, version, grid, published_at):
+        self.version = version
+        self.grid = grid
+        self.published_at = published_at
+        online = grid[grid["AQI"] > 0]
+        self.summary = {
+            "avg_aqi": int(online["AQI"].mean()) if len(online) else 0,
+            "active": int(len(online)),
+            "total": int(len(grid)),
+            "hotspots": int((grid["AQI"] > HOTSPOT_AQI).sum()),
+        }
+
+
+class SnapshotFeed:
+    """
+    Single owner of a city's live grid. A background thread rebuilds the grid every `interval`
+    seconds from fresh upstream readings and publishes it only if some ward's readings changed;
+    sessions poll changes_since() with the version they last saw and get back just the changed rows.
+    """
+    def __init__(self, engine, interval, per_ward=False, history=FEED_HISTORY):
+        self.engine = engine
+        self.interval = interval
+        self.per_ward = per_ward
+        self._history = OrderedDict()          # version -> Snapshot, oldest first
+        self._max_history = history
+        self._lock = threading.Lock()
+        self._published = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None                 # message of the last failed refresh, cleared on success
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"feed-{self.engine.city.id}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            delay = self.interval
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                delay = min(self.interval, FEED_RETRY_SECONDS)
+                self.engine.metrics.inc("fallback_total", reason="feed_refresh_failed", city=self.engine.city.id)
+                log.warning(f"⚠️ Snapshot refresh failed for {self.engine.city.id}: {e}")
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def refresh(self):
+        """Builds a grid from fresh readings; publishes a new version only if any ward changed. Returns the latest Snapshot."""
+        grid = self.engine.refresh_live_data(self.per_ward)
+        with self._lock:
+            latest = next(reversed(self._history.values()), None)
+            if latest is None or len(_changed_rows(latest.grid, grid)):
+                snap = Snapshot(grid.attrs["version"], grid, time.time())
+                self._history[snap.version] = snap
+                while len(self._history) > self._max_history:
+                    self._history.popitem(last=False)
+                latest = snap
+        self._published.set()
+        return latest
+
+    def request_refresh(self):
+        """Wakes the refresher now instead of at the next interval."""
+        self._wake.set()
+
+    def current(self, timeout=None):
+        """Latest Snapshot, waiting for the first refresh if nothing has been published yet."""
+        if not self._published.wait(timeout):
+            return None
+        with self._lock:
+            return next(reversed(self._history.values()))
+
+    def snapshot(self, version):
+        """A specific published version, or None if it has dropped out of the history."""
+        with self._lock:
+            return self._history.get(version)
+
+    def changes_since(self, version, timeout=None):
+        """
+        (snapshot, delta) for a session that last saw `version`. delta holds only the wards whose
+        readings changed, with their previous AQI in "Prev AQI"; it is None when the session must
+        take the whole snapshot (first view, or its version has dropped out of the history).
+        Both are None if nothing has been published within `timeout`.
+        """
+        snap = self.current(timeout)
+        if snap is None:
+            return None, None
+        with self._lock:
+            seen = self._history.get(version)
+        if seen is None:
+            return snap, None
+        if seen.version == snap.version:
+            return snap, snap.grid.iloc[0:0]
+        rows = _changed_rows(seen.grid, snap.grid)
+        delta = snap.grid.iloc[rows].copy()
+        delta.insert(delta.columns.get_loc("AQI") + 1, "Prev AQI", seen.grid["AQI"].to_numpy()[rows])
+        return snap, delta
+
+
+def _changed_rows(old, new):
+    """Row positions whose DELTA_COLUMNS differ; grids follow registry order, so positions line up."""
+    changed = np.zeros(len(new), dtype=bool)
+    for col in DELTA_COLUMNS:
+        changed |= old[col].to_numpy(dtype=object) != new[col].to_numpy(dtype=object)
+    return np.flatnonzero(changed)
@@ -0,0 +1,173 @@
+import os
+import logging
+import threading
+import zipfile
+import numpy as np
+import pandas as pd
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from store import LOCAL_OFFSET, LOCAL_TZ, TIMESERIES_DIR
+
+# --- FORECASTER SETTINGS ---
+FORECAST_STATE_PATH = os.path.join(os.path.dirname(TIMESERIES_DIR), "forecast_state.npz")
+LEVEL_ALPHA = 0.3       # smoothing of the de-seasonalised level
+SEASON_GAMMA = 0.1      # smoothing of the hour-of-day profile
+FIT_DAYS = 14           # history replayed when no saved state exists
+
+log = logging.getLogger("ecosense")
+
+
+def _hour_start(when):
+    """Epoch seconds of the start of `when`'s local hour."""
+    return int(when.astimezone(LOCAL_TZ).replace(minute=0, second=0, microsecond=0).timestamp())
+
+
+class HourlyForecaster:
+    """
+    Additive level + hour-of-day seasonal exponential smoothing, held as (W,) and (W, 24)
+    matrices so every ward is updated and forecast in the same array operation.
+    The model takes one step per completed local hour, like the hourly rollups it is fitted
+    from; snapshots within an hour are averaged first, so the refresh cadence does not change it.
+    The fitted state is saved next to the time-series store.
+    """
+    def __init__(self, ward_names, state_path=FORECAST_STATE_PATH):
+        self.ward_names = list(ward_names)
+        self.index = {w: i for i, w in enumerate(self.ward_names)}
+        self.state_path = state_path
+        n = len(self.ward_names)
+        self.level = np.full(n, np.nan)
+        self.season = np.zeros((n, 24))
+        # Running sum/count of the current hour's snapshots, stepped in once the hour is over
+        self.pending_hour = None            # local start of that hour, epoch seconds
+        self.pending_sum = np.zeros(n)
+        self.pending_count = np.zeros(n)
+        self.version = 0
+        self._lock = threading.Lock()
+        self.file_lock = None               # cross-process lock factory; the dashboard and the cron pipeline share a city dir
+
+    @property
+    def fitted(self):
+        return bool(np.isfinite(self.level).any())
+
+    def _step(self, x, hour):
+        """One smoothing step for every ward; NaN observations leave that ward untouched."""
+        hour = np.broadcast_to(np.asarray(hour), x.shape)
+        rows = np.arange(len(x))
+        seen = np.isfinite(x)
+        s = self.season[rows, hour]
+        fresh = seen & ~np.isfinite(self.level)
+        self.level[fresh] = x[fresh] - s[fresh]
+        new_level = np.where(seen, LEVEL_ALPHA * (x - s) + (1 - LEVEL_ALPHA) * self.level, self.level)
+        self.season[rows, hour] = np.where(seen, SEASON_GAMMA * (x - new_level) + (1 - SEASON_GAMMA) * s, s)
+        self.level = new_level
+
+    def fit_from_store(self, store, days=FIT_DAYS):
+        """Replays the last `days` of completed hourly rollups for all wards as one (W, T) matrix."""
+        # The current hour is still filling up; update() folds it in once it is complete
+        end = _hour_start(datetime.now(LOCAL_TZ)) - 1
+        start = end - days * 86400
+        times, matrix = store.query_matrix(self.ward_names, start, end, resolution="hour")
+        if not len(times):
+            return self
+        hours = (times + LOCAL_OFFSET) // 3600 % 24
+        with self._lock:
+            for j in range(len(times)):
+                self._step(matrix[:, j], hours[j])
+            self.version += 1
+        return self
+
+    def update(self, snapshot_df, when=None):
+        """
+        Adds one grid snapshot to the current hour's average; the first snapshot of a new hour
+        steps the model with the previous hour's means. Offline wards (AQI 0) are skipped.
+        """
+        hour = _hour_start(when or datetime.now(LOCAL_TZ))
+        x = np.zeros(len(self.ward_names))
+        seen = np.zeros(len(self.ward_names))
+        for ward, aqi in zip(snapshot_df["Ward"], snapshot_df["AQI"]):
+            if aqi > 0 and ward in self.index:
+                x[self.index[ward]] = aqi
+                seen[self.index[ward]] = 1
+        with self._lock:
+            if self.pending_hour is not None and hour > self.pending_hour:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    means = np.where(self.pending_count > 0, self.pending_sum / self.pending_count, np.nan)
+                self._step(means, datetime.fromtimestamp(self.pending_hour, LOCAL_TZ).hour)
+                self.pending_sum[:] = 0
+                self.pending_count[:] = 0
+                self.version += 1
+            if self.pending_hour is None or hour >= self.pending_hour:
+                self.pending_hour = hour
+                self.pending_sum += x
+                self.pending_count += seen
+
+    def forecast(self, hours=24, start=None):
+        """(W, hours) matrix of hourly forecasts beginning at the next hour."""
+        start = start or datetime.now(LOCAL_TZ)
+        ahead = (start.hour + 1 + np.arange(hours)) % 24
+        with self._lock:
+            return np.maximum(self.level[:, None] + self.season[:, ahead], 0)
+
+    def forecast_frame(self, hours=24):
+        """Long-form forecasts for every ward: Ward, Time, AQI."""
+        now = datetime.now(LOCAL_TZ).replace(minute=0, second=0, microsecond=0)
+        values = self.forecast(hours, now)
+        times = [now + timedelta(hours=k + 1) for k in range(hours)]
+        return pd.DataFrame({
+            "Ward": np.repeat(self.ward_names, hours),
+            "Time": np.tile(np.array(times, dtype=object), len(self.ward_names)),
+            "AQI": values.ravel().round(),
+        }).dropna()
+
+    def daily_ratios(self, ward_name, days=3):
+        """
+        Forecast mean of each coming day relative to the model's estimate for the current hour,
+        or None if the ward is unfitted.
+        """
+        i = self.index.get(ward_name)
+        if i is None or not np.isfinite(self.level[i]):
+            return None
+        now = datetime.now(LOCAL_TZ)
+        daily = self.forecast(days * 24, now)[i].reshape(days, 24).mean(axis=1)
+        current = self.level[i] + self.season[i, now.hour]
+        return daily / current if current > 0 else None
+
+    def save(self):
+        """Writes the state to a temporary file and swaps it in, so readers never see a partial file."""
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with self._lock:
+            state = dict(wards=np.array(self.ward_names, dtype=str), level=self.level.copy(), season=self.season.copy(),
+                         pending_hour=-1 if self.pending_hour is None else self.pending_hour,
+                         pending_sum=self.pending_sum.copy(), pending_count=self.pending_count.copy())
+        tmp = f"{self.state_path}.{os.getpid()}.tmp"
+        with self.file_lock() if self.file_lock else nullcontext():
+            with open(tmp, "wb") as f:
+                np.savez(f, **state)
+            os.replace(tmp, self.state_path)
+
+    @classmethod
+    def load_or_fit(cls, ward_names, store, state_path=FORECAST_STATE_PATH):
+        model = cls(ward_names, state_path)
+        model.file_lock = store.exclusive_lock
+        if os.path.exists(state_path):
+            try:
+                with np.load(state_path) as saved:
+                    model._restore(saved)
+                return model
+            except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+                log.warning(f"⚠️ Forecast state {state_path} unreadable ({e}); refitting from the store")
+                model = cls(ward_names, state_path)
+                model.file_lock = store.exclusive_lock
+        return model.fit_from_store(store)
+
+    def _restore(self, saved):
+        rows = {w: i for i, w in enumerate(saved["wards"])}
+        for w, i in self.index.items():
+            if w in rows:
+                self.level[i] = saved["level"][rows[w]]
+                self.season[i] = saved["season"][rows[w]]
+                if "pending_sum" in saved.files:
+                    self.pending_sum[i] = saved["pending_sum"][rows[w]]
+                    self.pending_count[i] = saved["pending_count"][rows[w]]
+        if "pending_hour" in saved.files and int(saved["pending_hour"]) >= 0:
+            self.pending_hour = int(saved["pending_hour"])
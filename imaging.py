@@ -0,0 +1,97 @@
+import io
+import os
+import threading
+from collections import deque
+import numpy as np
+from PIL import Image, ImageOps
+
+# --- CITIZEN EYE IMAGE PIPELINE ---
+IMAGE_PIXEL_BUDGET = 1024 * 1024    # images are downsized to at most ~1 MP before upload
+JPEG_QUALITY = 85
+PHASH_DUPLICATE_BITS = 6            # Hamming distance at or below which two photos count as the same scene
+DEDUP_MEMORY = 2000                 # recent analyses kept for near-duplicate lookups
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+_GPS_IFD = 0x8825
+
+
+def _dct_matrix(n):
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+_DCT32 = _dct_matrix(32)
+
+
+def perceptual_hash(image):
+    """64-bit pHash: sign of the low-frequency 8x8 DCT block of a 32x32 greyscale thumbnail vs its median."""
+    pixels = np.asarray(image.convert("L").resize((32, 32), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT32 @ pixels @ _DCT32.T)[:8, :8].ravel()
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def _to_degrees(dms, ref):
+    deg = float(dms[0]) + float(dms[1]) / 60 + float(dms[2]) / 3600
+    return -deg if ref in ("S", "W") else deg
+
+
+def extract_gps(image):
+    """(lat, lon) from EXIF GPSInfo, or None."""
+    try:
+        gps = image.getexif().get_ifd(_GPS_IFD)
+        if 2 in gps and 4 in gps:
+            return _to_degrees(gps[2], gps.get(1, "N")), _to_degrees(gps[4], gps.get(3, "E"))
+    except Exception:
+        pass
+    return None
+
+
+def preprocess_image(image, pixel_budget=IMAGE_PIXEL_BUDGET):
+    """
+    Orients, downsizes and re-encodes an upload as an EXIF-free JPEG. GPS is read before the
+    metadata is dropped. Returns {"image", "bytes", "gps", "phash"}.
+    """
+    gps = extract_gps(image)
+    img = ImageOps.exif_transpose(image).convert("RGB")
+    w, h = img.size
+    if w * h > pixel_budget:
+        scale = (pixel_budget / (w * h)) ** 0.5
+        img = img.resize((max(1, int(w * scale)), max(1, int(h * scale))), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    data = buf.getvalue()
+    clean = Image.open(io.BytesIO(data))
+    clean.load()
+    return {"image": clean, "bytes": data, "gps": gps, "phash": perceptual_hash(clean)}
+
+
+def load_folder(path):
+    """PIL images for every supported file in a folder, sorted by name."""
+    names = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTENSIONS))
+    return [(n, Image.open(os.path.join(path, n))) for n in names]
+
+
+class NearDuplicateIndex:
+    """Recent (pHash, result) pairs; lookups compare against all of them in one vectorized popcount."""
+    def __init__(self, max_bits=PHASH_DUPLICATE_BITS, maxlen=DEDUP_MEMORY):
+        self.max_bits = max_bits
+        self._hashes = deque(maxlen=maxlen)
+        self._results = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def find(self, phash):
+        with self._lock:
+            if not self._hashes:
+                return None
+            hashes = np.fromiter(self._hashes, dtype=np.uint64, count=len(self._hashes))
+            diff = np.bitwise_xor(hashes, np.uint64(phash))
+            distances = np.unpackbits(diff.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+            best = int(np.argmin(distances))
+            return self._results[best] if distances[best] <= self.max_bits else None
+
+    def add(self, phash, result):
+        with self._lock:
+            self._hashes.append(phash)
+            self._results.append(result)
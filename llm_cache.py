@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import Future
+from metrics import METRICS
+
+# --- LLM RESPONSE CACHE ---
+LLM_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "llm_cache.sqlite")
+LLM_CACHE_TTL = 24 * 3600      # seconds
+LLM_CACHE_MAX_ENTRIES = 2000   # least recently used entries are evicted beyond this
+
+
+def normalize_prompt(prompt):
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def image_digest(image):
+    """Content hash of a PIL image (pixels, size and mode), independent of file name or container."""
+    h = hashlib.sha256()
+    h.update(f"{image.mode}:{image.size}".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def cache_key(model_name, prompt, image=None):
+    parts = [model_name, normalize_prompt(prompt)]
+    if image is not None:
+        parts.append(image_digest(image))
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed, SQLite-backed cache for generated text with TTL and LRU eviction.
+    get_or_compute() is single-flight: concurrent callers with the same key wait for one upstream call.
+    """
+    def __init__(self, path=LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES, metrics=METRICS):
+        self.ttl = ttl
+        self.metrics = metrics
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, created REAL, accessed REAL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, result):
+        if result == "miss":
+            self.misses += 1
+        else:
+            self.hits += 1
+        self.metrics.inc("cache_total", cache="llm", result=result)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now, now))
+            count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+                    (count - self.max_entries,))
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True):
+        value = self.get(key)
+        if value is not None:
+            self._count("hit")
+            return value
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            self._count("coalesced")
+            return future.result()
+
+        self._count("miss")
+        try:
+            value = compute()
+            if cacheable(value):
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stream_or_compute(self, key, stream, cacheable=lambda value: True):
+        """
+        Generator version of get_or_compute: a hit or a coalesced follower yields the whole text
+        at once, the leader yields upstream chunks as they arrive and caches the joined result.
+        """
+        value = self.get(key)
+        if value is not None:
+            self._count("hit")
+            yield value
+            return
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+        if not leader:
+            try:
+                value = future.result()
+            except Exception:
+                value = None    # leader failed or was abandoned; stream our own copy below
+            if value is not None:
+                self._count("coalesced")
+                yield value
+                return
+
+        self._count("miss")
+        chunks = []
+        try:
+            for chunk in stream():
+                chunks.append(chunk)
+                yield chunk
+            value = "".join(chunks)
+            if cacheable(value):
+                self.put(key, value)
+            if leader:
+                future.set_result(value)
+        except GeneratorExit:
+            # Consumer stopped reading early: release followers so they stream for themselves
+            if leader:
+                future.set_exception(RuntimeError("stream abandoned"))
+            raise
+        except BaseException as e:
+            if leader:
+                future.set_exception(e)
+            raise
+        finally:
+            if leader:
+                with self._lock:
+                    self._inflight.pop(key, None)
@@ -0,0 +1,75 @@
+import folium
+from folium.plugins import HeatMap, FastMarkerCluster
+
+# --- MAP LAYER SETTINGS ---
+MARKER_CLUSTER_THRESHOLD = 500     # above this many sensors, markers are built client-side and clustered
+HEAT_AGGREGATE_THRESHOLD = 5000    # above this many readings, the heatmap is fed pre-aggregated cells
+HEAT_CELL_DEGREES = 0.005          # ~500 m cells
+VIEWPORT_THRESHOLD = 2000         # above this many sensors, only markers inside the current viewport are sent
+HEAT_GRADIENT = {0.4: 'green', 0.65: 'yellow', 0.9: 'red', 1.0: 'purple'}
+
+# Runs in the browser: one circle marker per [lat, lon, popup_html, color] row
+_CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+        {radius: 8, color: "white", weight: 1, fillColor: row[3], fillOpacity: 0.9});
+    marker.bindPopup(row[2], {maxWidth: 200});
+    return marker;
+}
+"""
+
+
+def popup_html(df):
+    """Popup markup for every row, built with column-wise string ops instead of per-row formatting."""
+    return ("<div style='font-family:sans-serif;width:150px;'><b>" + df['Ward'].astype(str)
+            + "</b><br><span style='color:" + df['Color'].astype(str) + ";font-weight:bold;'>AQI: "
+            + df['AQI'].astype(str) + "</span><br><small>" + df['Cause'].astype(str) + "</small></div>")
+
+
+def heat_points(df):
+    online = df[df['AQI'] > 0]
+    if len(online) <= HEAT_AGGREGATE_THRESHOLD:
+        return online[['Lat', 'Lon', 'AQI']].to_numpy().tolist()
+    cells = online.assign(
+        Lat=(online['Lat'] / HEAT_CELL_DEGREES).round() * HEAT_CELL_DEGREES,
+        Lon=(online['Lon'] / HEAT_CELL_DEGREES).round() * HEAT_CELL_DEGREES,
+    ).groupby(['Lat', 'Lon'], as_index=False)['AQI'].mean()
+    return cells[['Lat', 'Lon', 'AQI']].to_numpy().tolist()
+
+
+def marker_rows(df):
+    """[lat, lon, popup_html, color] per sensor: plain data, safe to cache and share between sessions."""
+    return list(zip(df['Lat'].tolist(), df['Lon'].tolist(), popup_html(df).tolist(), df['Color'].tolist()))
+
+
+def markers_from_rows(rows):
+    """Sensor markers as one new FeatureGroup; client-side clustering for large grids."""
+    layer = folium.FeatureGroup(name="Sensors")
+    if len(rows) > MARKER_CLUSTER_THRESHOLD:
+        FastMarkerCluster(rows, callback=_CLUSTER_CALLBACK).add_to(layer)
+    else:
+        for lat, lon, html, color in rows:
+            folium.CircleMarker([lat, lon], radius=8, color="white", weight=1, fill=True, fill_color=color, fill_opacity=0.9, popup=folium.Popup(html, max_width=200)).add_to(layer)
+    return layer
+
+
+def marker_layer(df):
+    return markers_from_rows(marker_rows(df))
+
+
+def base_map(points, center, zoom_start=12):
+    """A new map with just the heatmap of `points` (see heat_points)."""
+    m = folium.Map(location=center, zoom_start=zoom_start, tiles="CartoDB dark_matter")
+    HeatMap(points, radius=25, blur=15, gradient=HEAT_GRADIENT).add_to(m)
+    return m
+
+
+def build_map(df, center, zoom_start=12, markers=True):
+    """
+    Heatmap plus (optionally) sensor markers. Folium objects are mutable (st_folium attaches
+    feature groups to the map it is given), so cache heat_points()/marker_rows() rather than maps.
+    """
+    m = base_map(heat_points(df), center, zoom_start)
+    if markers:
+        marker_layer(df).add_to(m)
+    return m
@@ -0,0 +1,197 @@
+import bisect
+import functools
+import inspect
+import json
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+# --- METRICS SETTINGS ---
+METRIC_PREFIX = "ecosense_"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)                          # bytes
+SUMMARY_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Fixed-bucket histogram: one bisect and two additions per observation, quantiles estimated from buckets."""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Linear interpolation inside the bucket holding the q-th observation (Prometheus-style)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.bounds[-1]
+
+
+class Metrics:
+    """
+    In-process counters and histograms keyed by (name, labels). Updates take one lock and touch
+    a handful of ints, so they are cheap enough to leave on in production.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self.started = time.time()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observes the block's duration in seconds; exceptions also bump <name>_errors_total."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc(f"{name}_errors_total", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+
+    def _copy(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (h.bounds, list(h.counts), h.sum, h.count) for k, h in self._histograms.items()}
+        return counters, histograms
+
+    # --- EXPORT ---
+    def summary(self):
+        """One row per series, for tables: counters carry a value, histograms count/mean/quantiles."""
+        counters, histograms = self._copy()
+        rows = []
+        for (name, labels), value in sorted(counters.items()):
+            rows.append({"metric": name, "labels": _label_text(labels), "type": "counter", "count": value})
+        for (name, labels), (bounds, counts, total, count) in sorted(histograms.items()):
+            hist = Histogram(bounds)
+            hist.counts, hist.sum, hist.count = counts, total, count
+            row = {"metric": name, "labels": _label_text(labels), "type": "histogram", "count": count,
+                   "mean": total / count if count else 0.0, "sum": total}
+            for q in SUMMARY_QUANTILES:
+                row[f"p{int(q * 100)}"] = hist.quantile(q)
+            rows.append(row)
+        return rows
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        counters, histograms = self._copy()
+        lines = []
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{METRIC_PREFIX}{name}{_prom_labels(labels)} {value}")
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+            for (n, labels), (bounds, counts, total, count) in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, c in zip(list(bounds) + ["+Inf"], counts):
+                    cumulative += c
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{_prom_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{_prom_labels(labels)} {total}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{_prom_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_jsonl(self):
+        """One JSON object per series, stamped with the export time."""
+        ts = time.time()
+        return "".join(json.dumps({"ts": ts, **row}) + "\n" for row in self.summary())
+
+
+def _label_text(labels):
+    return ",".join(f"{k}={v}" for k, v in labels)
+
+
+def _prom_labels(labels):
+    if not labels:
+        return ""
+    escaped = (k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+# --- INSTRUMENTATION ---
+def _timed_iter(gen, metrics, labels, start):
+    """Keeps a stage's clock running until the generator it returned is exhausted or closed."""
+    try:
+        yield from gen
+    except Exception as e:
+        metrics.inc("stage_errors_total", error=type(e).__name__, **labels)
+        raise
+    finally:
+        metrics.observe("stage_seconds", time.perf_counter() - start, **labels)
+
+
+def _timed_method(stage, fn):
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+        labels = {"stage": stage, **getattr(self, "metric_labels", {})}
+        start = time.perf_counter()
+        try:
+            result = fn(self, *args, **kwargs)
+        except Exception as e:
+            metrics.inc("stage_errors_total", error=type(e).__name__, **labels)
+            metrics.observe("stage_seconds", time.perf_counter() - start, **labels)
+            raise
+        if isinstance(result, types.GeneratorType):
+            return _timed_iter(result, metrics, labels, start)
+        metrics.observe("stage_seconds", time.perf_counter() - start, **labels)
+        return result
+    return wrapper
+
+
+def instrument(cls):
+    """
+    Class decorator: times every public method under stage=<method name>, using self.metrics
+    and any extra labels in self.metric_labels (e.g. the city).
+    """
+    for name, fn in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.isfunction(fn):
+            setattr(cls, name, _timed_method(name, fn))
+    return cls
+
+
+METRICS = Metrics()
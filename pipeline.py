@@ -0,0 +1,119 @@
+"""
+Headless EcoSense pipeline: grid snapshot -> cause attribution -> policy optimisation and
+Monte Carlo projections -> forecasts -> (optional) advisories, written as Parquet files.
+Every configured city is processed concurrently into its own folder. No Streamlit import;
+keys come from the environment or the command line. Run it from cron:
+
+    */15 * * * * cd /srv/ecosense && python pipeline.py --advisory-threshold 300
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from store import LOCAL_TZ
+from utils import CityHub, CITIES, REPORT_LANGUAGES, LLM_MAX_CONCURRENCY
+
+PIPELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pipeline")
+
+
+def _write(frame, folder, name):
+    path = os.path.join(folder, f"{name}.parquet")
+    frame.to_parquet(path, index=False)
+    return path
+
+
+def run_once(engine, out_dir, per_ward=False, advisory_threshold=None, languages=("English",)):
+    started = time.perf_counter()
+    stamp = datetime.now(LOCAL_TZ)
+    out_dir = os.path.join(out_dir, engine.city.id)
+    folder = os.path.join(out_dir, stamp.strftime("%Y-%m-%d"), stamp.strftime("%H%M%S"))
+    os.makedirs(folder, exist_ok=True)
+
+    # 1. Grid snapshot (causes are attributed inside generate_live_data; also appended to the store)
+    grid = engine.generate_live_data(per_ward=per_ward)
+    _write(grid, folder, "grid")
+
+    # 2. Policy combinations and the recommended package per ward
+    _write(engine.optimize_policies(grid), folder, "policy_options")
+    packages = engine.recommend_policy_packages(grid).reset_index()
+    packages["Policies"] = packages["Policies"].map(",".join)
+    _write(packages, folder, "packages")
+
+    # 3. Monte Carlo bands: no action vs. recommended package, for every ward
+    policy_sets = sorted({()} | {tuple(p.split(",")) if p else () for p in packages["Policies"]})
+    projections = engine.simulate_policy_grid(grid, [list(p) for p in policy_sets])
+    _write(projections, folder, "projections")
+
+    # 4. Hourly forecasts for every ward
+    forecast = engine.forecast_all(24).assign(Time=lambda f: pd.to_datetime(f["Time"].tolist()))
+    _write(forecast, folder, "forecast")
+
+    # 5. Advisories for wards above the threshold, drafted in parallel
+    if advisory_threshold is not None and engine.gemini_key:
+        hot = grid[grid["AQI"] > advisory_threshold]
+        jobs = [(ward, lang) for _, ward in hot.iterrows() for lang in languages]
+        with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY) as pool:
+            texts = list(pool.map(lambda job: engine.generate_segmented_report(job[0], "Public", job[1]), jobs))
+        rows = [{"Ward": w["Ward"], "AQI": w["AQI"], "Category": "Public", "Language": lang, "Text": t} for (w, lang), t in zip(jobs, texts)]
+        if rows:
+            _write(pd.DataFrame(rows), folder, "advisories")
+
+    with open(os.path.join(out_dir, "LATEST"), "w", encoding="utf-8") as f:
+        f.write(os.path.relpath(folder, out_dir))
+    print(f"✅ {engine.city.name} pipeline run written to {folder} in {time.perf_counter() - started:.2f}s")
+    return folder
+
+
+def _write_metrics(metrics, path):
+    # Written to a temp file and renamed so a scraper (e.g. node_exporter's textfile collector) never reads half a file
+    text = metrics.to_prometheus() if path.endswith(".prom") else metrics.to_jsonl()
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the EcoSense pipeline without the dashboard.")
+    parser.add_argument("--out", default=PIPELINE_DIR, help="output directory, one sub-folder per city (default: data/pipeline)")
+    parser.add_argument("--cities", nargs="+", default=list(CITIES), choices=list(CITIES), help="cities to run (default: all configured)")
+    parser.add_argument("--owm-key", default=os.environ.get("OWM_KEY"), help="OpenWeatherMap key (env OWM_KEY)")
+    parser.add_argument("--gemini-key", default=os.environ.get("GEMINI_KEY"), help="Gemini key (env GEMINI_KEY)")
+    parser.add_argument("--per-ward", action="store_true", help="fetch real readings for every ward")
+    parser.add_argument("--advisory-threshold", type=int, default=None, help="draft health advisories for wards above this AQI")
+    parser.add_argument("--languages", nargs="+", default=["English"], choices=REPORT_LANGUAGES)
+    parser.add_argument("--every", type=int, default=None, help="repeat every N seconds instead of running once")
+    parser.add_argument("--metrics-out", default=None, help="write engine metrics after each run (.prom = Prometheus text, else JSON lines)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if not args.owm_key:
+        print("⚠️ No OWM key given; the grid will be synthesized from the fallback baseline", file=sys.stderr)
+    hub = CityHub(args.owm_key, args.gemini_key, cities={c: CITIES[c] for c in args.cities})
+
+    def run_city(city_id):
+        try:
+            run_once(hub[city_id], args.out, args.per_ward, args.advisory_threshold, args.languages)
+            return True
+        except Exception as e:
+            print(f"⚠️ {city_id} pipeline run failed: {e}", file=sys.stderr)
+            return False
+
+    with ThreadPoolExecutor(max_workers=len(args.cities)) as pool:
+        while True:
+            ok = all(list(pool.map(run_city, hub)))
+            if args.metrics_out:
+                _write_metrics(hub[args.cities[0]].metrics, args.metrics_out)
+            if args.every is None:
+                return 0 if ok else 1
+            time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
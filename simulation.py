@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+# --- MONTE CARLO SETTINGS ---
+MC_TRIALS = 100_000
+MC_SEED = 2026                    # fixed default so reruns show the same bands
+MC_HORIZON_DAYS = 3
+MC_PERCENTILES = [5, 50, 95]
+MC_MIN_AQI = 30
+
+EFFECTIVENESS_CONCENTRATION = 20  # Beta(α·k, (1-α)·k) around each policy's nominal reduction
+COMPLIANCE_CONCENTRATION = 12     # Beta(β·k, (1-β)·k) around each policy's compliance rate
+MAX_TOTAL_REDUCTION = 0.9
+DECAY_MEAN = [1.0, 0.95, 0.92]    # sustained effect relative to Day 1 (the old fixed curve)
+DECAY_SD = 0.02
+MET_SIGMA = 0.10                  # day-to-day meteorological noise (log scale)
+MET_PERSISTENCE = 0.6             # AR(1) correlation of weather between consecutive days
+
+PARALLEL_THRESHOLD = 2_000_000    # scenario × trial count above which work goes to the process pool
+# Workers start from a clean server process rather than forking the threaded dashboard/pipeline
+POOL_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _decay_path(horizon):
+    if horizon <= len(DECAY_MEAN):
+        return np.array(DECAY_MEAN[:horizon])
+    # Extend the curve with the last day-on-day ratio
+    ratio = DECAY_MEAN[-1] / DECAY_MEAN[-2]
+    extra = DECAY_MEAN[-1] * ratio ** np.arange(1, horizon - len(DECAY_MEAN) + 1)
+    return np.concatenate([DECAY_MEAN, extra])
+
+
+def _sample_beta(rng, means, concentration, n_trials):
+    """(n_trials, len(means)) Beta draws around each mean; means of exactly 0 or 1 are certain and not sampled."""
+    draws = np.tile(means, (n_trials, 1))
+    uncertain = (means > 0) & (means < 1)
+    if uncertain.any():
+        m = means[uncertain]
+        draws[:, uncertain] = rng.beta(m * concentration, (1 - m) * concentration, size=(n_trials, len(m)))
+    return draws
+
+
+def simulate_scenario(current_aqi, reductions, compliance, n_trials, horizon, seed_seq, baseline=None):
+    """
+    Vectorized trials for one ward/policy scenario. baseline optionally scales each day by the
+    no-intervention forecast (e.g. tomorrow expected 10% worse -> 1.1).
+    Returns a (horizon, len(MC_PERCENTILES) + 1) array: percentiles then the mean, per day.
+    """
+    rng = np.random.default_rng(seed_seq)
+    reductions = np.asarray(reductions, dtype=np.float64)
+    compliance = np.asarray(compliance, dtype=np.float64)
+
+    if len(reductions):
+        alpha = _sample_beta(rng, reductions, EFFECTIVENESS_CONCENTRATION, n_trials)
+        beta = _sample_beta(rng, compliance, COMPLIANCE_CONCENTRATION, n_trials)
+        total = np.minimum((alpha * beta).sum(axis=1), MAX_TOTAL_REDUCTION)
+    else:
+        total = np.zeros(n_trials)
+
+    decay = _decay_path(horizon) + rng.normal(0, DECAY_SD, size=(n_trials, horizon))
+    decay[:, 0] = 1.0
+
+    # AR(1) weather shocks, stationary with variance MET_SIGMA²
+    shocks = rng.normal(0, MET_SIGMA, size=(n_trials, horizon))
+    innovation = np.sqrt(1 - MET_PERSISTENCE ** 2)
+    for d in range(1, horizon):
+        shocks[:, d] = MET_PERSISTENCE * shocks[:, d - 1] + innovation * shocks[:, d]
+
+    base = np.ones(horizon) if baseline is None else np.asarray(baseline, dtype=np.float64)[:horizon]
+    aqi = current_aqi * base * (1 - total)[:, None] * decay * np.exp(shocks)
+    aqi = np.maximum(aqi, MC_MIN_AQI)
+    bands = np.percentile(aqi, MC_PERCENTILES, axis=0).T
+    return np.column_stack([bands, aqi.mean(axis=0)])
+
+
+def _run_job(job):
+    return simulate_scenario(*job)
+
+
+class MonteCarloEngine:
+    """
+    Samples policy effectiveness, compliance and weather for every scenario. Each scenario gets its
+    own child SeedSequence, so results are identical whether it runs inline or in a worker process.
+    """
+    def __init__(self, n_trials=MC_TRIALS, horizon_days=MC_HORIZON_DAYS, seed=MC_SEED, max_workers=None):
+        self.n_trials = n_trials
+        self.horizon_days = horizon_days
+        self.seed = seed
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._pool_lock = threading.Lock()   # the engine is shared by every city's engine and thread
+
+    def _executor(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(POOL_START_METHOD))
+            return self._pool
+
+    def run(self, scenarios, seed=None):
+        """
+        scenarios: list of (current_aqi, reductions, compliance) or
+        (current_aqi, reductions, compliance, baseline) tuples.
+        Returns an (n_scenarios, horizon, len(MC_PERCENTILES) + 1) array.
+        """
+        seeds = np.random.SeedSequence(self.seed if seed is None else seed).spawn(len(scenarios))
+        jobs = [(sc[0], sc[1], sc[2], self.n_trials, self.horizon_days, s, sc[3] if len(sc) > 3 else None) for sc, s in zip(scenarios, seeds)]
+        if len(jobs) > 1 and self.max_workers > 1 and len(jobs) * self.n_trials > PARALLEL_THRESHOLD:
+            chunksize = max(1, len(jobs) // (self.max_workers * 4))
+            results = list(self._executor().map(_run_job, jobs, chunksize=chunksize))
+        else:
+            results = [_run_job(job) for job in jobs]
+        return np.stack(results) if results else np.empty((0, self.horizon_days, len(MC_PERCENTILES) + 1))
+
+    def forecast_frame(self, current_aqi, reductions, compliance, baseline=None, seed=None):
+        """Single-scenario forecast curve in the shape the Action Console plots."""
+        result = self.run([(current_aqi, reductions, compliance, baseline)], seed=seed)[0]
+        return pd.DataFrame({
+            "Day": [f"Day {d + 1}" for d in range(self.horizon_days)],
+            "Predicted AQI": result[:, 1].round().astype(int),
+            "P5": result[:, 0].round().astype(int),
+            "P95": result[:, 2].round().astype(int),
+            "Mean": result[:, 3].round().astype(int),
+        })
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
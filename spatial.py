@@ -0,0 +1,124 @@
+import numpy as np
+
+# --- SPATIAL INDEX SETTINGS ---
+CELL_KM = 1.0             # uniform grid cell edge
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON_EQ = 111.320
+IDW_POWER = 2
+IDW_RADIUS_KM = 3.0
+
+
+class SpatialIndex:
+    """
+    Uniform-grid index over lat/lon points, projected to a local km plane (accurate at city scale).
+    Points are sorted by cell id once; a cell lookup is a binary search into that order, so
+    nearest / radius / bounding-box queries only touch the few cells around the query.
+    """
+    def __init__(self, lat, lon, cell_km=CELL_KM):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_km = cell_km
+        self.ref_lat = float(self.lat.mean()) if len(self.lat) else 0.0
+        self.x, self.y = self._project(self.lat, self.lon)
+        cx = np.floor(self.x / cell_km).astype(np.int64)
+        cy = np.floor(self.y / cell_km).astype(np.int64)
+        # Cells are counted from the south-west corner so the (cx, cy) key order matches the sort order
+        self.cx_min = int(cx.min()) if len(cx) else 0
+        self.cy_min = int(cy.min()) if len(cy) else 0
+        self.nx = int(cx.max()) - self.cx_min + 1 if len(cx) else 0
+        self.ny = int(cy.max()) - self.cy_min + 1 if len(cy) else 0
+        keys = self._cell_key(cx - self.cx_min, cy - self.cy_min)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.lat)
+
+    def _project(self, lat, lon):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        return lon * KM_PER_DEG_LON_EQ * np.cos(np.radians(self.ref_lat)), lat * KM_PER_DEG_LAT
+
+    def _cell_key(self, cx, cy):
+        return np.asarray(cx, dtype=np.int64) * max(self.ny, 1) + np.asarray(cy, dtype=np.int64)
+
+    def _cell_of(self, x, y):
+        return int(np.floor(x / self.cell_km)) - self.cx_min, int(np.floor(y / self.cell_km)) - self.cy_min
+
+    def _cells(self, cx0, cx1, cy0, cy1):
+        """Indices of every point in the cell rectangle [cx0..cx1] × [cy0..cy1] (grid-relative)."""
+        cx0, cx1 = max(cx0, 0), min(cx1, self.nx - 1)
+        cy0, cy1 = max(cy0, 0), min(cy1, self.ny - 1)
+        if cx0 > cx1 or cy0 > cy1:
+            return np.empty(0, dtype=np.int64)
+        parts = []
+        for cx in range(cx0, cx1 + 1):
+            lo, hi = np.searchsorted(self.keys, [self._cell_key(cx, cy0), self._cell_key(cx, cy1) + 1])
+            if hi > lo:
+                parts.append(self.order[lo:hi])
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def _distances(self, idx, x, y):
+        return np.hypot(self.x[idx] - x, self.y[idx] - y)
+
+    def nearest(self, lat, lon):
+        """(index, distance_km) of the closest point, growing the search ring until it is conclusive."""
+        if not len(self):
+            return None, np.inf
+        x, y = self._project(lat, lon)
+        cx, cy = self._cell_of(x, y)
+        # Ring size at which the search square covers the whole grid
+        span = max(cx, self.nx - 1 - cx, cy, self.ny - 1 - cy, 0)
+        # Queries outside the grid start at the first ring that reaches it
+        ring = max(0, -cx, cx - (self.nx - 1), -cy, cy - (self.ny - 1))
+        while True:
+            idx = self._cells(cx - ring, cx + ring, cy - ring, cy + ring)
+            if len(idx):
+                d = self._distances(idx, x, y)
+                best = int(np.argmin(d))
+                # Anything outside the searched square is at least `ring` cells away
+                if d[best] <= ring * self.cell_km or ring >= span:
+                    return int(idx[best]), float(d[best])
+            elif ring >= span:
+                return None, np.inf
+            ring += 1
+
+    def within_radius(self, lat, lon, radius_km):
+        x, y = self._project(lat, lon)
+        r = int(np.ceil(radius_km / self.cell_km))
+        cx, cy = self._cell_of(x, y)
+        idx = self._cells(cx - r, cx + r, cy - r, cy + r)
+        d = self._distances(idx, x, y)
+        keep = d <= radius_km
+        return idx[keep], d[keep]
+
+    def within_bbox(self, south, west, north, east):
+        x0, y0 = self._project(south, west)
+        x1, y1 = self._project(north, east)
+        (cx0, cy0), (cx1, cy1) = self._cell_of(x0, y0), self._cell_of(x1, y1)
+        idx = self._cells(cx0, cx1, cy0, cy1)
+        keep = (self.lat[idx] >= south) & (self.lat[idx] <= north) & (self.lon[idx] >= west) & (self.lon[idx] <= east)
+        return np.sort(idx[keep])
+
+    def idw(self, lats, lons, values, power=IDW_POWER, radius_km=IDW_RADIUS_KM, valid=None):
+        """
+        Inverse-distance-weighted interpolation of `values` (one per indexed point) at each query
+        point, using the points within radius_km or, if there are none, the nearest one.
+        `valid` masks out points (e.g. offline sensors) that must not contribute.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = np.ones(len(values), dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+        out = np.full(len(np.atleast_1d(lats)), np.nan)
+        for q, (lat, lon) in enumerate(zip(np.atleast_1d(lats), np.atleast_1d(lons))):
+            idx, d = self.within_radius(lat, lon, radius_km)
+            idx, d = idx[valid[idx]], d[valid[idx]]
+            if not len(idx):
+                i, _ = self.nearest(lat, lon)
+                out[q] = values[i] if i is not None and valid[i] else np.nan
+                continue
+            if (d < 1e-9).any():
+                out[q] = values[idx[np.argmin(d)]]
+                continue
+            w = 1.0 / d ** power
+            out[q] = (w * values[idx]).sum() / w.sum()
+        return out
@@ -0,0 +1,278 @@
+import json
+import os
+import threading
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+try:
+    import fcntl
+except ImportError:     # Windows: writers are only serialised within one process
+    fcntl = None
+
+# --- TIME-SERIES STORE ---
+TIMESERIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "timeseries")
+
+# Raw readings: one append-only file per day, one block of records (one per online ward) per snapshot
+RAW_DTYPE = np.dtype([("ts", "<i8"), ("ward", "<i4"), ("aqi", "<f4"), ("pm25", "<f4"), ("no2", "<f4")])
+# Rollups: one file per resolution holding a (bucket, ward) matrix; the last bucket row is updated
+# in place and new buckets are appended as rows. Bucket start times live in a parallel index file.
+ROLLUP_DTYPE = np.dtype([("count", "<i4"), ("sum_aqi", "<f8"), ("sum_pm25", "<f8"), ("sum_no2", "<f8"), ("max_aqi", "<f4")])
+BUCKET_DTYPE = np.dtype("<i8")
+ROLLUP_HEADER = np.dtype([("width", "<i8")])   # ward columns per row, so a file is readable on its own
+RESOLUTIONS = {"hour": 3600, "day": 86400}
+# Day partitions and daily buckets follow local (IST, no DST) midnight rather than UTC
+LOCAL_TZ = timezone(timedelta(hours=5, minutes=30))
+LOCAL_OFFSET = 19800
+
+
+def _bucket(ts, seconds):
+    return ts - (ts + LOCAL_OFFSET) % seconds
+
+
+def _to_epoch(value):
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(timezone.utc)
+    return int(ts.timestamp())
+
+
+class TimeSeriesStore:
+    """
+    Append-only, memory-mapped store of grid snapshots. Each append writes one raw block to the
+    day's partition and folds the whole snapshot into one row of each rollup matrix, so its cost
+    is a handful of writes however many wards there are. The dashboard and the cron pipeline may
+    share a store: appends take an exclusive file lock, queries a shared one.
+    """
+    def __init__(self, root=TIMESERIES_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._wards = (None, [], {})   # (file stamp, names in column order, name -> column)
+
+    def _raw_path(self, day):
+        return os.path.join(self.root, "raw", f"{day}.bin")
+
+    def _rollup_path(self, resolution):
+        return os.path.join(self.root, f"{resolution}.bin")
+
+    def _bucket_path(self, resolution):
+        return os.path.join(self.root, f"{resolution}.buckets")
+
+    @contextmanager
+    def _file_lock(self, exclusive):
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, ".lock"), "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def exclusive_lock(self):
+        """Cross-process write lock of this store, for state files kept alongside it."""
+        return self._file_lock(exclusive=True)
+
+    @staticmethod
+    def _read(path, dtype, offset=0):
+        if not os.path.exists(path) or os.path.getsize(path) < offset + dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+    # --- WARD COLUMNS ---
+    def _load_wards(self):
+        """(names, index) of the ward columns, re-read only when another writer has changed wards.json."""
+        path = os.path.join(self.root, "wards.json")
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return [], {}
+        stamp = (st.st_ino, st.st_mtime_ns)
+        cached = self._wards
+        if cached[0] != stamp:
+            with open(path, encoding="utf-8") as f:
+                names = json.load(f)
+            cached = self._wards = (stamp, names, {w: i for i, w in enumerate(names)})
+        return cached[1], cached[2]
+
+    def _save_wards(self, wards):
+        path = os.path.join(self.root, "wards.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(wards, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _ward_ids(self, names):
+        """Column index per ward, registering wards seen for the first time (caller holds the write lock)."""
+        wards, index = self._load_wards()
+        new = [n for n in dict.fromkeys(names) if n not in index]
+        if new:
+            wards = wards + new
+            index = {w: i for i, w in enumerate(wards)}
+            self._save_wards(wards)
+        return np.fromiter((index[n] for n in names), dtype=np.int32, count=len(names)), len(wards)
+
+    # --- ROLLUPS ---
+    def _rollup_width(self, path):
+        if not os.path.exists(path) or os.path.getsize(path) < ROLLUP_HEADER.itemsize:
+            return 0
+        with open(path, "rb") as f:
+            return int(np.frombuffer(f.read(ROLLUP_HEADER.itemsize), dtype=ROLLUP_HEADER)[0]["width"])
+
+    def _read_rollup(self, resolution):
+        """(buckets, matrix) with one row per bucket and one column per ward, memory-mapped."""
+        path = self._rollup_path(resolution)
+        buckets = self._read(self._bucket_path(resolution), BUCKET_DTYPE)
+        width = self._rollup_width(path)
+        if not len(buckets) or not width:
+            return buckets[:0], np.empty((0, width), dtype=ROLLUP_DTYPE)
+        rows = min(len(buckets), (os.path.getsize(path) - ROLLUP_HEADER.itemsize) // (width * ROLLUP_DTYPE.itemsize))
+        matrix = np.memmap(path, dtype=ROLLUP_DTYPE, mode="r", offset=ROLLUP_HEADER.itemsize, shape=(rows, width))
+        return buckets[:rows], matrix
+
+    def _widen_rollup(self, resolution, width):
+        """Rewrites a rollup with room for newly registered wards; only happens when the ward list grows."""
+        path = self._rollup_path(resolution)
+        buckets, old = self._read_rollup(resolution)
+        if old.shape[1] >= width:
+            return
+        matrix = np.zeros((len(buckets), width), dtype=ROLLUP_DTYPE)
+        matrix[:, :old.shape[1]] = old
+        del old
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(np.array([(width,)], dtype=ROLLUP_HEADER).tobytes())
+            f.write(matrix.tobytes())
+        os.replace(f"{path}.tmp", path)
+
+    def _insert_bucket(self, resolution, pos, bucket):
+        """Backfill of a bucket older than the newest one: rewrites both files with an empty row at pos."""
+        path, bucket_path = self._rollup_path(resolution), self._bucket_path(resolution)
+        buckets, matrix = self._read_rollup(resolution)
+        width = matrix.shape[1]
+        buckets = np.insert(np.array(buckets), pos, bucket)
+        matrix = np.insert(np.array(matrix), pos, np.zeros(width, dtype=ROLLUP_DTYPE), axis=0)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(np.array([(width,)], dtype=ROLLUP_HEADER).tobytes())
+            f.write(matrix.tobytes())
+        with open(f"{bucket_path}.tmp", "wb") as f:
+            f.write(buckets.astype(BUCKET_DTYPE).tobytes())
+        os.replace(f"{path}.tmp", path)
+        os.replace(f"{bucket_path}.tmp", bucket_path)
+
+    def _fold_rollup(self, resolution, bucket, ids, aqi, pm25, no2):
+        path, bucket_path = self._rollup_path(resolution), self._bucket_path(resolution)
+        buckets, matrix = self._read_rollup(resolution)
+        pos = int(np.searchsorted(buckets, bucket))
+        new_bucket = pos == len(buckets)
+        if not new_bucket and buckets[pos] != bucket:
+            del buckets, matrix
+            self._insert_bucket(resolution, pos, bucket)
+            buckets, matrix = self._read_rollup(resolution)
+        width = matrix.shape[1]
+        row = np.zeros(width, dtype=ROLLUP_DTYPE) if new_bucket else np.array(matrix[pos])
+        del buckets, matrix
+        row["count"][ids] += 1
+        row["sum_aqi"][ids] += aqi
+        row["sum_pm25"][ids] += pm25
+        row["sum_no2"][ids] += no2
+        row["max_aqi"][ids] = np.maximum(row["max_aqi"][ids], aqi)
+        # Row first, then the bucket index: a crash in between leaves a stray row that the next append overwrites
+        with open(path, "r+b") as f:
+            f.seek(ROLLUP_HEADER.itemsize + pos * width * ROLLUP_DTYPE.itemsize)
+            f.write(row.tobytes())
+        if new_bucket:
+            with open(bucket_path, "ab") as f:
+                f.write(np.array([bucket], dtype=BUCKET_DTYPE).tobytes())
+
+    def append_snapshot(self, df, when=None):
+        """Appends one grid snapshot. Offline sensors (AQI 0) are skipped."""
+        ts = _to_epoch(when if when is not None else datetime.now(timezone.utc))
+        day = datetime.fromtimestamp(ts, LOCAL_TZ).strftime("%Y-%m-%d")
+        online = df[df["AQI"] > 0]
+        if online.empty:
+            return
+        aqi = online["AQI"].to_numpy(dtype=np.float64)
+        pm25 = online["PM2.5"].to_numpy(dtype=np.float64)
+        no2 = online["NO2"].to_numpy(dtype=np.float64)
+        with self._lock, self._file_lock(exclusive=True):
+            ids, width = self._ward_ids(online["Ward"].tolist())
+            block = np.empty(len(ids), dtype=RAW_DTYPE)
+            block["ts"], block["ward"], block["aqi"], block["pm25"], block["no2"] = ts, ids, aqi, pm25, no2
+            raw_path = self._raw_path(day)
+            os.makedirs(os.path.dirname(raw_path), exist_ok=True)
+            with open(raw_path, "ab") as f:
+                f.write(block.tobytes())
+            for resolution, seconds in RESOLUTIONS.items():
+                if self._rollup_width(self._rollup_path(resolution)) < width:
+                    self._widen_rollup(resolution, width)
+                self._fold_rollup(resolution, _bucket(ts, seconds), ids, aqi, pm25, no2)
+
+    def query(self, ward, start, end=None, resolution="hour"):
+        """
+        Readings for one ward in [start, end]. resolution is "raw", "hour" or "day";
+        rollups return per-bucket means plus the bucket's peak AQI.
+        """
+        start_ts = _to_epoch(start)
+        end_ts = _to_epoch(end if end is not None else datetime.now(timezone.utc)) + 1
+        with self._file_lock(exclusive=False):
+            col = self._load_wards()[1].get(ward)
+            if resolution == "raw":
+                parts = []
+                day = datetime.fromtimestamp(start_ts, LOCAL_TZ).date()
+                last_day = datetime.fromtimestamp(end_ts, LOCAL_TZ).date()
+                while col is not None and day <= last_day:
+                    recs = self._read(self._raw_path(day.strftime("%Y-%m-%d")), RAW_DTYPE)
+                    if len(recs):
+                        parts.append(np.array(recs[(recs["ward"] == col) & (recs["ts"] >= start_ts) & (recs["ts"] < end_ts)]))
+                    day += timedelta(days=1)
+                recs = np.concatenate(parts) if parts else np.empty(0, dtype=RAW_DTYPE)
+                return pd.DataFrame({
+                    "Time": pd.to_datetime(recs["ts"], unit="s", utc=True).tz_convert(LOCAL_TZ),
+                    "AQI": recs["aqi"], "PM2.5": recs["pm25"], "NO2": recs["no2"],
+                })
+            buckets, matrix = self._read_rollup(resolution)
+            # Buckets are kept in time order, so the range is a binary search
+            lo, hi = np.searchsorted(buckets, [_bucket(start_ts, RESOLUTIONS[resolution]), end_ts])
+            if col is None or col >= matrix.shape[1]:
+                lo = hi = 0
+                cells = np.empty(0, dtype=ROLLUP_DTYPE)
+            else:
+                cells = np.array(matrix[lo:hi, col])
+            times = np.array(buckets[lo:hi])
+        # A ward registered after these buckets has empty cells there
+        keep = cells["count"] > 0
+        cells, times = cells[keep], times[keep]
+        count = np.maximum(cells["count"], 1)
+        return pd.DataFrame({
+            "Time": pd.to_datetime(times, unit="s", utc=True).tz_convert(LOCAL_TZ),
+            "AQI": (cells["sum_aqi"] / count).round().astype(int),
+            "PM2.5": cells["sum_pm25"] / count,
+            "NO2": cells["sum_no2"] / count,
+            "Peak AQI": cells["max_aqi"],
+            "Samples": cells["count"],
+        })
+
+    def query_matrix(self, wards, start, end=None, resolution="hour"):
+        """
+        Mean AQI of many wards in [start, end] from one rollup read: (bucket times as epoch
+        seconds, (len(wards), T) matrix) with NaN where a ward has no readings in a bucket.
+        """
+        start_ts = _to_epoch(start)
+        end_ts = _to_epoch(end if end is not None else datetime.now(timezone.utc)) + 1
+        with self._file_lock(exclusive=False):
+            index = self._load_wards()[1]
+            buckets, matrix = self._read_rollup(resolution)
+            lo, hi = np.searchsorted(buckets, [_bucket(start_ts, RESOLUTIONS[resolution]), end_ts])
+            cols = np.array([index.get(w, -1) for w in wards], dtype=np.int64)
+            known = (cols >= 0) & (cols < matrix.shape[1])
+            cells = np.array(matrix[lo:hi][:, cols[known]])
+            times = np.array(buckets[lo:hi])
+        values = np.full((len(wards), len(times)), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values[known] = np.where(cells["count"] > 0, cells["sum_aqi"] / cells["count"], np.nan).T.round()
+        return times, values
@@ -1,109 +1,590 @@
 import requests
 import random
+import threading
+import time
+import json
+import os
+import copy
+import hashlib
+import itertools
+import logging
+import numpy as np
 import pandas as pd
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
-from PIL import Image
-import streamlit as st
+from simulation import MonteCarloEngine
+from store import TimeSeriesStore, LOCAL_TZ, TIMESERIES_DIR
+from forecast import HourlyForecaster, FORECAST_STATE_PATH
+from llm_cache import ResponseCache, cache_key, LLM_CACHE_PATH
+from spatial import SpatialIndex
+from metrics import METRICS, SIZE_BUCKETS, instrument
+from feed import SnapshotFeed
+
+log = logging.getLogger("ecosense")
 
 # --- CONSTANTS ---
-JAIPUR_COORDS = {"lat": 26.9124, "lon": 75.7873}
-
-WARDS = {
-    "Sitapura Ind. Area": {"lat": 26.78, "lon": 75.82, "type": "Industrial", "risk_factor": 1.8, "pop_density": "Medium"},
-    "Raja Park": {"lat": 26.90, "lon": 75.83, "type": "Commercial", "risk_factor": 1.4, "pop_density": "High"},
-    "Civil Lines": {"lat": 26.91, "lon": 75.78, "type": "Residential", "risk_factor": 0.6, "pop_density": "Low"},
-    "Nahargarh Fort": {"lat": 26.93, "lon": 75.81, "type": "Green Zone", "risk_factor": 0.4, "pop_density": "Very Low"},
-    "Transport Nagar": {"lat": 26.90, "lon": 75.85, "type": "Traffic Hub", "risk_factor": 1.9, "pop_density": "High"},
-    "Malviya Nagar": {"lat": 26.85, "lon": 75.81, "type": "Residential", "risk_factor": 0.9, "pop_density": "High"},
-    "VKI Area": {"lat": 26.99, "lon": 75.77, "type": "Industrial", "risk_factor": 1.7, "pop_density": "Medium"},
-    "Amer Fort": {"lat": 26.98, "lon": 75.85, "type": "Tourist Zone", "risk_factor": 0.5, "pop_density": "Variable"},
-    "Mansarovar": {"lat": 26.86, "lon": 75.76, "type": "Residential", "risk_factor": 1.1, "pop_density": "Very High"},
-    "Chandpol": {"lat": 26.92, "lon": 75.80, "type": "Market", "risk_factor": 1.5, "pop_density": "Very High"}
-}
-
-OFFICER_DB = {
-    "Sitapura Ind. Area": {"Name": "Insp. Rajesh Verma", "ID": "IND-88", "Unit": "Industrial Squad", "Phone": "+91-9876543210"},
-    "Raja Park": {"Name": "Off. Suman Singh", "ID": "COM-12", "Unit": "City Patrol", "Phone": "+91-9876543211"},
-    "Transport Nagar": {"Name": "Sgt. Vikram Rathore", "ID": "TRF-99", "Unit": "Traffic Control", "Phone": "+91-9876543212"},
-    "Chandpol": {"Name": "Insp. Anjali Mehra", "ID": "MKT-45", "Unit": "Crowd Control", "Phone": "+91-9876543213"},
-    "Amer Fort": {"Name": "Off. P. Sharma", "ID": "TOUR-01", "Unit": "Tourist Police", "Phone": "+91-9876543214"}
-}
+OWM_AIR_URL = "http://api.openweathermap.org/data/2.5/air_pollution"
+OWM_TIMEOUT = (2, 3)        # (connect, read) seconds per request
+OWM_MAX_WORKERS = 64        # concurrent requests / pooled keep-alive connections
+DEFAULT_BASELINE = {"aqi": 160, "pm25": 85, "no2": 40, "o3": 30}   # used when OWM gives no city reading
+GRID_FETCH_DEADLINE = 0.9   # seconds from the start of a per-ward refresh; readings still pending fall back to synthesis
+GRID_TTL_SECONDS = 300      # default freshness window for baseline, ward readings and the grid snapshot
+VISION_FALLBACK_MODEL = "models/gemini-1.5-flash"
+DEFAULT_MODEL = "models/gemini-1.5-flash"   # used until model discovery has run once
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+MODEL_DISCOVERY_PATH = os.path.join(DATA_DIR, "model_discovery.json")
+MODEL_DISCOVERY_TTL = 24 * 3600             # seconds before the persisted model name is re-validated
+LLM_MAX_CONCURRENCY = 4     # parallel Gemini generations per process
+REPORT_CATEGORIES = ["Industrial", "Public", "Traffic"]
+REPORT_LANGUAGES = ["English", "Hindi"]
+
+class WardRegistry:
+    """Columnar view of a ward dict: float arrays for geometry/risk, integer codes for categories."""
+    def __init__(self, wards):
+        self.names = np.array(list(wards.keys()), dtype=object)
+        self.lat = np.array([m['lat'] for m in wards.values()], dtype=np.float64)
+        self.lon = np.array([m['lon'] for m in wards.values()], dtype=np.float64)
+        self.risk_factor = np.array([m['risk_factor'] for m in wards.values()], dtype=np.float64)
+        types = pd.Categorical([m['type'] for m in wards.values()])
+        self.type_categories = list(types.categories)
+        self.type_codes = types.codes.astype(np.int16)
+        self.pop_density = pd.Categorical([m['pop_density'] for m in wards.values()])
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def type_values(self, mapping, default):
+        """Per-ward array built from a {type_name: value} table."""
+        lookup = np.array([mapping.get(t, default) for t in self.type_categories], dtype=np.float64)
+        return lookup[self.type_codes]
+
+# Grid synthesis tables (per ward type)
+AQI_TYPE_MULTIPLIER = {"Industrial": 1.2, "Traffic Hub": 1.3, "Green Zone": 0.6}
+NO2_TYPE_MULTIPLIER = {"Traffic Hub": 1.8}
+SENSOR_OFFLINE_RATE = 0.05
+
+# AQI colour bands: values below AQI_BAND_EDGES[i] get AQI_BAND_COLORS[i]
+AQI_BAND_EDGES = [50, 100, 200, 300, 400]
+AQI_BAND_COLORS = np.array(["#00B050", "#92D050", "#FFFF00", "#FF9900", "#FF0000", "#C00000"], dtype=object)
+OFFLINE_COLOR = "#808080"
+STATUS_CATEGORIES = ["Online ✅", "Offline ❌"]
+
+# --- POLICY TABLE ---
+MIN_PREDICTED_AQI = 30
+POLICY_TARGET_AQI = 100                           # "Satisfactory" upper bound used by the package recommender
+
+
+class PolicyTable:
+    """
+    A policy config as arrays, plus a (2^P x P) boolean matrix enumerating every policy subset.
+    labour_rate is ₹ per person per day; scaled_types are ward types that need double deployment.
+    """
+    def __init__(self, config, labour_rate, scaled_types):
+        self.config = config
+        self.labour_rate = labour_rate
+        self.scaled_types = list(scaled_types)
+        self.keys = list(config.keys())
+        self.names = [c["name"] for c in config.values()]
+        self.reduction = np.array([c["reduction"] for c in config.values()], dtype=np.float64)
+        self.daily_cost = np.array([c["base_cost"] + c["manpower"] * labour_rate for c in config.values()], dtype=np.int64)
+        self.compliance = np.array([c.get("compliance", 1.0) for c in config.values()], dtype=np.float64)
+        self.targets = [set(c["target"]) for c in config.values()]
+        for key, field in itertools.product(self.keys, ("reduction", "compliance")):
+            value = config[key].get(field, 1.0)
+            if not 0 <= value <= 1:
+                raise ValueError(f"Policy '{key}': {field} must be between 0 and 1, got {value}")
+        p = len(self.keys)
+        self.subsets = ((np.arange(2 ** p)[:, None] >> np.arange(p)) & 1).astype(bool)
+        self.subset_labels = np.array([" + ".join(n for n, on in zip(self.names, row) if on) or "No Action" for row in self.subsets], dtype=object)
+        self.subset_keys = [tuple(k for k, on in zip(self.keys, row) if on) for row in self.subsets]
+
+    def applicability(self, ward_types):
+        """(W x P) mask of which policies act on each ward's type."""
+        types = pd.Categorical(ward_types)
+        per_type = np.array([[("All" in t) or (cat in t) for t in self.targets] for cat in types.categories], dtype=bool)
+        return per_type.reshape(-1, len(self.keys))[types.codes]
+
+    def scenario_arrays(self, ward_type, active_policies):
+        """Reduction and compliance vectors of the active policies that act on ward_type."""
+        idx = [i for i, k in enumerate(self.keys) if k in active_policies and ("All" in self.targets[i] or ward_type in self.targets[i])]
+        return self.reduction[idx], self.compliance[idx]
+
+    def scale(self, ward_types):
+        return np.where(np.isin(np.asarray(ward_types, dtype=object), self.scaled_types), 2, 1)
+
+
+# --- CITY REGISTRY ---
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+CITIES_DIR = os.path.join(CONFIG_DIR, "cities")
+CAUSE_RULES_PATH = os.path.join(CONFIG_DIR, "cause_rules.json")
+OFFICER_FALLBACK = {"Name": "Central Command", "ID": "GEN-00", "Unit": "General Patrol", "Phone": "100"}
+
+
+class CityConfig:
+    """One city's wards (as a WardRegistry), field officers, policy table, baseline point and map view."""
+    def __init__(self, city_id, name, center, map_center, map_zoom, wards, officers, policies):
+        self.id = city_id
+        self.name = name
+        self.center = center            # {"lat", "lon"} of the city-wide OWM baseline reading
+        self.map_center = map_center
+        self.map_zoom = map_zoom
+        self.wards = wards
+        self.registry = WardRegistry(wards)
+        self.officers = officers
+        self.policies = policies
+        self.policy_table = PolicyTable(policies["policies"], policies["labour_daily_rate"], policies["scaled_ward_types"])
+
+    @classmethod
+    def from_file(cls, path):
+        """config/cities/<id>.json; "policies" is inline or a path relative to the city file."""
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+        policies = spec["policies"]
+        if isinstance(policies, str):
+            with open(os.path.join(os.path.dirname(path), policies), encoding="utf-8") as f:
+                policies = json.load(f)
+        city_id = os.path.splitext(os.path.basename(path))[0]
+        center = spec["center"]
+        view = spec.get("map", {})
+        return cls(city_id, spec.get("name", city_id.title()), center,
+                   view.get("center", [center["lat"], center["lon"]]), view.get("zoom", 12),
+                   spec["wards"], spec.get("officers", {}), policies)
+
+
+def load_cities(folder=CITIES_DIR):
+    """{city_id: CityConfig} for every JSON file in folder, in file-name order."""
+    names = sorted(n for n in os.listdir(folder) if n.endswith(".json"))
+    return {c.id: c for c in (CityConfig.from_file(os.path.join(folder, n)) for n in names)}
+
+CITIES = load_cities()
+DEFAULT_CITY_ID = os.environ.get("ECOSENSE_CITY") or ("jaipur" if "jaipur" in CITIES else next(iter(CITIES)))
+
+
+class CauseRuleEngine:
+    """
+    Table-driven source apportionment. Rules are checked in order and the first match wins.
+    Each rule: {"cause", optional "types", "when": [alternatives]}; an alternative is a dict of
+    AND-ed conditions ("pm25_gt", "no2_lte", "peak", ...) and any alternative matching is enough.
+    """
+    FIELDS = ("pm25", "no2")
+    OPS = {"gt": np.greater, "gte": np.greater_equal, "lt": np.less, "lte": np.less_equal}
+
+    def __init__(self, rules, peak_hours, default):
+        self.rules = rules
+        self.default = default
+        self.peak_table = np.zeros(24, dtype=bool)
+        for start, end in peak_hours:
+            self.peak_table[start:end + 1] = True
+        for rule in rules:
+            for alt in rule.get("when", [{}]):
+                for key in alt:
+                    if key != "peak" and key.rpartition("_")[::2] not in {(f, o) for f in self.FIELDS for o in self.OPS}:
+                        raise ValueError(f"Unknown condition '{key}' in cause rule '{rule['cause']}'")
+
+    @classmethod
+    def from_file(cls, path=CAUSE_RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            cfg = json.load(f)
+        return cls(cfg["rules"], cfg.get("peak_hours", []), cfg.get("default", "Background Haze 🌫️"))
+
+    def attribute(self, no2, pm25, ward_types, hours):
+        """
+        Vectorized attribution. ward_types is a sequence/Categorical of type names; hours is a
+        scalar hour for a snapshot or an array of hours for a historical series.
+        """
+        values = {"no2": np.asarray(no2), "pm25": np.asarray(pm25)}
+        types = pd.Categorical(ward_types)
+        codes = types.codes
+        categories = list(types.categories)
+        is_peak = self.peak_table[np.asarray(hours, dtype=np.int64)]
+        shape = values["no2"].shape
+
+        conditions = []
+        for rule in self.rules:
+            matched = np.zeros(shape, dtype=bool)
+            for alt in rule.get("when", [{}]):
+                cond = np.ones(shape, dtype=bool)
+                for key, threshold in alt.items():
+                    if key == "peak":
+                        cond &= is_peak == bool(threshold)
+                    else:
+                        field, op = key.rpartition("_")[::2]
+                        cond &= self.OPS[op](values[field], threshold)
+                matched |= cond
+            if "types" in rule:
+                matched &= np.isin(codes, [categories.index(t) for t in rule["types"] if t in categories])
+            conditions.append(matched)
+        return np.select(conditions, [r["cause"] for r in self.rules], default=self.default).astype(object)
+
+    def attribute_frame(self, df, time_col="Time"):
+        """Batch attribution over a historical frame with NO2, PM2.5, Type and a datetime column."""
+        hours = pd.to_datetime(df[time_col]).dt.hour.to_numpy()
+        return pd.Categorical(self.attribute(df["NO2"].to_numpy(), df["PM2.5"].to_numpy(), df["Type"], hours))
+
+# google.generativeai takes ~1 s to import, so it is loaded on first Gemini use rather than at startup
+_genai_module = None
+_genai_lock = threading.Lock()
+
+def _load_genai():
+    global _genai_module
+    with _genai_lock:
+        if _genai_module is None:
+            import google.generativeai
+            _genai_module = google.generativeai
+        return _genai_module
+
+
+class StaleWhileRevalidateCache:
+    """
+    Thread-safe TTL cache. Expired entries keep being served while a single
+    background thread reloads them; only a cold (missing) key blocks the caller.
+    """
+    def __init__(self, ttl, metrics=METRICS, **labels):
+        self.ttl = ttl
+        self.metrics = metrics
+        self.labels = labels
+        self._entries = {}          # key -> (value, loaded_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key, loader):
+        value = loader()
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+        return value
+
+    def _background_reload(self, key, loader):
+        try:
+            self._load(key, loader)
+        except Exception as e:
+            self.metrics.inc("fallback_total", reason="stale_refresh_failed")
+            log.warning(f"⚠️ Background refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
 
+    def get(self, key, loader, allow_stale=True):
+        kind = key[0] if isinstance(key, tuple) else key
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            if time.monotonic() - loaded_at < self.ttl:
+                self.metrics.inc("cache_total", cache=kind, result="hit", **self.labels)
+                return value
+            if allow_stale:
+                self.metrics.inc("cache_total", cache=kind, result="stale", **self.labels)
+                with self._lock:
+                    start = key not in self._refreshing
+                    self._refreshing.add(key)
+                if start:
+                    threading.Thread(target=self._background_reload, args=(key, loader), daemon=True).start()
+                return value
+        # Cold or must-be-fresh: one loader per key, concurrent callers wait and reuse its result
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self.metrics.inc("cache_total", cache=kind, result="coalesced", **self.labels)
+                return entry[0]
+            self.metrics.inc("cache_total", cache=kind, result="miss", **self.labels)
+            return self._load(key, loader)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+@instrument
 class PollutionEngine:
-    def __init__(self, owm_key, gemini_key, vision_key=None):
+    def __init__(self, owm_key, gemini_key, vision_key=None, grid_ttl=GRID_TTL_SECONDS,
+                 city=None, data_dir=None, owm_url=OWM_AIR_URL, genai_client=None, metrics=METRICS):
+        """
+        city / data_dir / owm_url / genai_client default to DEFAULT_CITY_ID, ./data, the public
+        OWM endpoint and google.generativeai; the benchmarks swap them for synthetic wards and local fakes.
+        Every public method is timed into `metrics` (see metrics.instrument).
+        """
+        self.metrics = metrics
         self.owm_key = owm_key
+        self.owm_url = owm_url
         self.gemini_key = gemini_key
         self.vision_key = vision_key if vision_key else gemini_key
-        
-        # Configure once at startup
+        self.grid_ttl = grid_ttl
+        self.data_dir = data_dir or DATA_DIR
+        self.cause_rules = CauseRuleEngine.from_file()
+        self.monte_carlo = MonteCarloEngine()
+        self.model_discovery_path = os.path.join(self.data_dir, os.path.basename(MODEL_DISCOVERY_PATH))
+        self.llm_cache = ResponseCache(os.path.join(self.data_dir, os.path.basename(LLM_CACHE_PATH)), metrics=metrics)
+        self._attach_city(city if city is not None else CITIES[DEFAULT_CITY_ID])
+
+        # One keep-alive pool shared by every OWM call, so refreshes skip the TCP/TLS handshake
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OWM_MAX_WORKERS)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self._fetch_pool = ThreadPoolExecutor(max_workers=OWM_MAX_WORKERS, thread_name_prefix="owm")
+        self._llm_pool = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="gemini")
+        self._models = {}
+        self._models_lock = threading.Lock()
+        self._model_state = {}
+        self._genai_client = genai_client
+        self._image_dedup = None
+
         if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
-            # DYNAMICALLY FIND A WORKING MODEL
-            self.active_model_name = self._get_working_model_name()
-            print(f"✅ PollutionEngine initialized using model: {self.active_model_name}")
+            # Persisted discovery result; stale or missing entries are re-validated in the background
+            self.active_model_name = self._cached_model_name()
         else:
             self.active_model_name = "gemini-pro" # Fallback
 
+    def _attach_city(self, city):
+        """Per-city state: ward registry and index, policy table, grid cache, store and forecaster."""
+        self.city = city
+        self.registry = city.registry
+        self.policy_table = city.policy_table
+        self.ward_index = SpatialIndex(self.registry.lat, self.registry.lon)
+        self.metric_labels = {"city": city.id}
+        self.cache = StaleWhileRevalidateCache(self.grid_ttl, self.metrics, city=city.id)
+        self.rng = np.random.default_rng()
+        city_dir = os.path.join(self.data_dir, city.id)
+        self.store = TimeSeriesStore(os.path.join(city_dir, os.path.basename(TIMESERIES_DIR)))
+        self.forecaster = HourlyForecaster.load_or_fit(self.registry.names, self.store, os.path.join(city_dir, os.path.basename(FORECAST_STATE_PATH)))
+        self._forecast_cache = None
+        self._grid_versions = itertools.count(1)
+        self._synthesis = None
+
+    def for_city(self, city):
+        """
+        Engine for another city that shares this one's HTTP pool, Gemini client and model choice,
+        LLM cache and Monte Carlo pool, but has its own grid cache, store and forecaster.
+        """
+        sibling = copy.copy(self)
+        sibling._attach_city(city)
+        return sibling
+
+    @property
+    def active_model_name(self):
+        return self._model_state["name"]
+
+    @active_model_name.setter
+    def active_model_name(self, name):
+        # Stored in a dict shared with for_city() siblings, so a background discovery updates every city
+        self._model_state["name"] = name
+
+    def _genai(self):
+        """Imports and configures google.generativeai on first use."""
+        with _genai_lock:
+            if self._genai_client is not None:
+                return self._genai_client
+        genai = _load_genai()
+        with _genai_lock:
+            if self._genai_client is None:
+                genai.configure(api_key=self.gemini_key)
+                self._genai_client = genai
+            return self._genai_client
+
+    def _discovery_id(self):
+        # Cache entries are per API key, stored as a hash so the key never touches disk
+        return hashlib.sha256(self.gemini_key.encode()).hexdigest()[:16]
+
+    def _cached_model_name(self):
+        try:
+            with open(self.model_discovery_path, encoding="utf-8") as f:
+                entry = json.load(f).get(self._discovery_id())
+        except (OSError, ValueError):
+            entry = None
+        if entry is None or time.time() - entry["ts"] > MODEL_DISCOVERY_TTL:
+            threading.Thread(target=self._refresh_model_name, daemon=True).start()
+        return entry["model"] if entry else DEFAULT_MODEL
+
+    def _refresh_model_name(self):
+        try:
+            name = self._discover_model_name()
+        except Exception as e:
+            self.metrics.inc("fallback_total", reason="model_discovery_failed")
+            log.warning(f"⚠️ Model Discovery Failed: {e}")
+            return
+        self.active_model_name = name
+        try:
+            os.makedirs(os.path.dirname(self.model_discovery_path), exist_ok=True)
+            try:
+                with open(self.model_discovery_path, encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = {}
+            entries[self._discovery_id()] = {"model": name, "ts": time.time()}
+            with open(self.model_discovery_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+        except OSError as e:
+            log.warning(f"⚠️ Model discovery not persisted: {e}")
+        log.info(f"✅ PollutionEngine using model: {name}")
+
     def _get_working_model_name(self):
         """
         Asks Google: 'What models do I have access to?' and picks the best one.
         This fixes the 404 error permanently.
         """
         try:
-            available_models = []
-            for m in genai.list_models():
-                if 'generateContent' in m.supported_generation_methods:
-                    available_models.append(m.name)
-            
-            # Priority: Flash -> Pro -> 1.5 -> Any
-            for m in available_models:
-                if "flash" in m and "1.5" in m: return m
-            for m in available_models:
-                if "flash" in m: return m
-            for m in available_models:
-                if "pro" in m and "1.5" in m: return m
-            
-            # If no specific priority found, take the first valid one
-            if available_models:
-                return available_models[0]
-                
-            return "models/gemini-1.5-flash" # Absolute fallback
+            return self._discover_model_name()
         except Exception as e:
-            print(f"⚠️ Model Discovery Failed: {e}")
+            self.metrics.inc("fallback_total", reason="model_discovery_failed")
+            log.warning(f"⚠️ Model Discovery Failed: {e}")
             return "gemini-pro"
 
+    def _discover_model_name(self):
+        """Raises on network/auth failure so callers decide what to fall back to."""
+        available_models = []
+        with self.metrics.timer("external", service="gemini", call="list_models"):
+            models = list(self._genai().list_models())
+        for m in models:
+            if 'generateContent' in m.supported_generation_methods:
+                available_models.append(m.name)
+        
+        # Priority: Flash -> Pro -> 1.5 -> Any
+        for m in available_models:
+            if "flash" in m and "1.5" in m: return m
+        for m in available_models:
+            if "flash" in m: return m
+        for m in available_models:
+            if "pro" in m and "1.5" in m: return m
+        
+        # If no specific priority found, take the first valid one
+        if available_models:
+            return available_models[0]
+            
+        return "models/gemini-1.5-flash" # Absolute fallback
+
     def _smart_generate(self, prompt, is_vision=False, image=None):
         if not self.gemini_key: return "⚠️ API Key Missing in secrets.toml"
-        
+
+        # Identical drafts (same model, prompt and image) are served from disk; concurrent ones share a call
+        key = cache_key(self.active_model_name, prompt, image if is_vision else None)
+        return self.llm_cache.get_or_compute(
+            key,
+            lambda: self._generate_uncached(prompt, is_vision, image),
+            cacheable=lambda text: not text.startswith("⚠️"),
+        )
+
+    def _model(self, name):
+        """GenerativeModel clients are built once per model name and reused across calls."""
+        with self._models_lock:
+            if name not in self._models:
+                self._models[name] = self._genai().GenerativeModel(name)
+            return self._models[name]
+
+    def _generate_uncached(self, prompt, is_vision=False, image=None):
+        call = "vision" if is_vision and image else "generate"
+        self.metrics.observe("external_request_bytes", len(prompt.encode()), SIZE_BUCKETS, service="gemini", call=call)
         try:
             # Use the dynamically found model
-            model = genai.GenerativeModel(self.active_model_name)
+            model = self._model(self.active_model_name)
             
             if is_vision and image:
                 # Vision often requires specific models, try 'gemini-1.5-flash' explicitly if the default fails
                 try:
-                    response = model.generate_content([prompt, image])
-                except:
+                    with self.metrics.timer("external", service="gemini", call=call):
+                        response = model.generate_content([prompt, image])
+                except Exception as e:
                     # Fallback for vision specifically
-                    vision_model = genai.GenerativeModel("models/gemini-1.5-flash")
-                    response = vision_model.generate_content([prompt, image])
+                    self.metrics.inc("fallback_total", reason="vision_fallback_model")
+                    log.warning(f"⚠️ Vision call failed on {self.active_model_name}, retrying {VISION_FALLBACK_MODEL}: {e}")
+                    with self.metrics.timer("external", service="gemini", call=call):
+                        response = self._model(VISION_FALLBACK_MODEL).generate_content([prompt, image])
             else:
-                response = model.generate_content(prompt)
-                
-            return response.text
+                with self.metrics.timer("external", service="gemini", call=call):
+                    response = model.generate_content(prompt)
+
+            text = response.text
+            self.metrics.observe("external_response_bytes", len(text.encode()), SIZE_BUCKETS, service="gemini", call=call)
+            return text
         except Exception as e:
+            self.metrics.inc("fallback_total", reason="llm_error")
+            log.warning(f"⚠️ AI Error ({self.active_model_name}): {e}")
             return f"⚠️ AI Error ({self.active_model_name}): {str(e)}"
 
+    def _stream_uncached(self, prompt):
+        self.metrics.observe("external_request_bytes", len(prompt.encode()), SIZE_BUCKETS, service="gemini", call="stream")
+        size = 0
+        try:
+            with self.metrics.timer("external", service="gemini", call="stream"):
+                for chunk in self._model(self.active_model_name).generate_content(prompt, stream=True):
+                    if chunk.text:
+                        size += len(chunk.text.encode())
+                        yield chunk.text
+        except Exception as e:
+            self.metrics.inc("fallback_total", reason="llm_error")
+            log.warning(f"⚠️ AI Error ({self.active_model_name}): {e}")
+            yield f"\n\n⚠️ AI Error ({self.active_model_name}): {str(e)}"
+        finally:
+            self.metrics.observe("external_response_bytes", size, SIZE_BUCKETS, service="gemini", call="stream")
+
+    def _smart_generate_stream(self, prompt):
+        """Text generation as a generator of chunks, sharing the response cache with _smart_generate."""
+        if not self.gemini_key:
+            yield "⚠️ API Key Missing in secrets.toml"
+            return
+        key = cache_key(self.active_model_name, prompt)
+        yield from self.llm_cache.stream_or_compute(
+            key,
+            lambda: self._stream_uncached(prompt),
+            cacheable=lambda text: "⚠️ AI Error" not in text,
+        )
+
     def get_ward_officer(self, ward_name):
-        return OFFICER_DB.get(ward_name, {
-            "Name": "Central Command", "ID": "GEN-00", "Unit": "General Patrol", "Phone": "100"
-        })
+        return self.city.officers.get(ward_name, OFFICER_FALLBACK)
+
+    # --- SPATIAL QUERIES (grid rows follow registry order, so index positions are row positions) ---
+    def nearest_ward(self, lat, lon):
+        """(ward_name, distance_km) of the ward centroid closest to a coordinate."""
+        i, dist = self.ward_index.nearest(lat, lon)
+        return (self.registry.names[i], dist) if i is not None else (None, dist)
+
+    def route_citizen_report(self, lat, lon):
+        """Ward and field officer responsible for a reported location."""
+        ward, dist = self.nearest_ward(lat, lon)
+        return {"Ward": ward, "Distance (km)": round(dist, 2), "Officer": self.get_ward_officer(ward)}
+
+    def wards_within(self, lat, lon, radius_km):
+        idx, dist = self.ward_index.within_radius(lat, lon, radius_km)
+        order = np.argsort(dist)
+        return pd.DataFrame({"Ward": self.registry.names[idx[order]], "Distance (km)": dist[order].round(2)})
+
+    def sensors_in_view(self, grid_df, south, west, north, east):
+        return grid_df.iloc[self.ward_index.within_bbox(south, west, north, east)]
 
-    def _fetch_city_baseline(self):
-        url = f"http://api.openweathermap.org/data/2.5/air_pollution?lat={JAIPUR_COORDS['lat']}&lon={JAIPUR_COORDS['lon']}&appid={self.owm_key}"
+    def interpolate_aqi(self, grid_df, lats, lons):
+        """IDW estimate of AQI at arbitrary points from the online sensors of a grid snapshot."""
+        aqi = grid_df['AQI'].to_numpy()
+        return self.ward_index.idw(lats, lons, aqi, valid=aqi > 0)
+
+    def _fetch_point(self, lat, lon, deadline=None):
+        """
+        Single OWM air-pollution reading for a coordinate, or None on any failure. With a deadline
+        (time.monotonic() value), the request is skipped once it has passed and its timeouts are
+        capped at the time left, so abandoned requests do not hold pool threads into the next refresh.
+        """
+        timeout = OWM_TIMEOUT
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            timeout = tuple(min(t, remaining) for t in OWM_TIMEOUT)
+        params = {"lat": lat, "lon": lon, "appid": self.owm_key}
         try:
-            response = requests.get(url, timeout=5).json()
+            with self.metrics.timer("external", service="owm", call="air_pollution"):
+                raw = self.http.get(self.owm_url, params=params, timeout=timeout)
+        except requests.RequestException:
+            return None     # already counted by the timer
+        try:
+            self.metrics.observe("external_response_bytes", len(raw.content), SIZE_BUCKETS, service="owm", call="air_pollution")
+            response = raw.json()
             if 'list' in response:
                 data = response['list'][0]
                 return {
@@ -112,71 +593,171 @@ class PollutionEngine:
                     "no2": data['components']['no2'],
                     "o3": data['components']['o3']
                 }
-            raise Exception("API Error")
-        except:
-            return {"aqi": 160, "pm25": 85, "no2": 40, "o3": 30}
+            self.metrics.inc("external_errors_total", service="owm", call="air_pollution", error=f"http_{raw.status_code}")
+        # requests' JSONDecodeError is also a RequestException, so it is caught here as a ValueError
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            self.metrics.inc("external_errors_total", service="owm", call="air_pollution", error=type(e).__name__)
+            log.debug(f"⚠️ Malformed OWM response for ({lat}, {lon}): {e}")
+        return None
+
+    def _fetch_city_baseline(self, deadline=None):
+        reading = self._fetch_point(self.city.center['lat'], self.city.center['lon'], deadline)
+        if reading:
+            return reading
+        self.metrics.inc("fallback_total", reason="owm_default_baseline")
+        log.warning("⚠️ OWM baseline unavailable; using the default city baseline")
+        return dict(DEFAULT_BASELINE)
+
+    def _fetch_ward_readings(self):
+        """
+        Fetches the city baseline and every ward concurrently over the pooled session, all bounded
+        by one GRID_FETCH_DEADLINE counted from the start of the refresh.
+        Returns (baseline, {ward_name: reading}); wards that failed or missed the deadline are left out.
+        """
+        deadline = time.monotonic() + GRID_FETCH_DEADLINE
+        base_future = self._fetch_pool.submit(self._fetch_city_baseline, deadline)
+        futures = {self._fetch_pool.submit(self._fetch_point, lat, lon, deadline): name for name, lat, lon in zip(self.registry.names, self.registry.lat, self.registry.lon)}
+        done, pending = wait([base_future, *futures], timeout=max(deadline - time.monotonic(), 0))
+        for f in pending:
+            f.cancel()
+        if base_future in done:
+            baseline = base_future.result()
+        else:
+            self.metrics.inc("fallback_total", reason="owm_default_baseline")
+            baseline = dict(DEFAULT_BASELINE)
+        readings = {}
+        for f in done:
+            reading = f.result() if f is not base_future else None
+            if reading:
+                readings[futures[f]] = reading
+        pending.discard(base_future)
+        missing = len(futures) - len(readings)
+        if missing:
+            self.metrics.inc("fallback_total", missing, reason="ward_synthesized")
+        if pending:
+            log.warning(f"⚠️ OWM deadline hit: {len(pending)}/{len(futures)} wards synthesized from baseline")
+        return baseline, readings
 
     def _calculate_cause(self, no2, pm25, ward_type, hour):
-        is_peak = 8 <= hour <= 11 or 17 <= hour <= 21
-        if ward_type == "Industrial" and pm25 > 100: return "Factory Smoke 🏭"
-        elif ward_type in ["Traffic Hub", "Market"] and (is_peak or no2 > 60): return "Vehicle Emissions 🚗"
-        elif ward_type == "Commercial" and is_peak: return "Traffic Congestion 🚦"
-        elif ward_type == "Residential" and pm25 > 120: return "Waste Burning/Dust 🔥"
-        elif ward_type in ["Green Zone", "Tourist Zone"] and pm25 > 100: return "Dust Storm (External) 🌪️"
-        elif no2 > 80: return "Heavy Diesel Transport 🚛"
-        else: return "Background Haze 🌫️"
-
-    def generate_live_data(self):
-        baseline = self._fetch_city_baseline()
+        return self.cause_rules.attribute([no2], [pm25], [ward_type], hour)[0]
+
+    def generate_live_data(self, per_ward=False):
+        """
+        per_ward=False: one baseline call, wards synthesized with risk_factor multipliers.
+        per_ward=True: real readings for every ward fetched concurrently; failures fall back to synthesis.
+        The whole grid is computed in one vectorized pass over the ward registry.
+        """
+        # Called from the grid loader, so upstream entries must be fresh rather than stale
+        if per_ward:
+            baseline, readings = self.cache.get("ward_readings", self._fetch_ward_readings, allow_stale=False)
+        else:
+            baseline, readings = self.cache.get("baseline", self._fetch_city_baseline, allow_stale=False), {}
         current_hour = datetime.now().hour
-        results = []
-        for name, meta in WARDS.items():
-            if random.random() < 0.05:
-                results.append({"Ward": name, "Lat": meta['lat'], "Lon": meta['lon'], "Type": meta['type'], "AQI": 0, "PM2.5": 0, "NO2": 0, "Status": "Offline ❌", "Cause": "Sensor Error", "Color": "#808080", "Impact": meta['pop_density']})
-                continue
-            noise = random.uniform(0.9, 1.1)
-            type_multiplier = 1.2 if meta['type'] == "Industrial" else 1.3 if meta['type'] == "Traffic Hub" else 0.6 if meta['type'] == "Green Zone" else 1.0
-            local_aqi = int(baseline['aqi'] * meta['risk_factor'] * type_multiplier * noise)
-            local_pm25 = int(baseline['pm25'] * meta['risk_factor'] * type_multiplier * noise)
-            local_no2 = int(baseline['no2'] * meta['risk_factor'] * (1.8 if meta['type'] == "Traffic Hub" else 1.0) * noise)
-            cause = self._calculate_cause(local_no2, local_pm25, meta['type'], current_hour)
-            if local_aqi < 50: color = "#00B050"
-            elif local_aqi < 100: color = "#92D050"
-            elif local_aqi < 200: color = "#FFFF00"
-            elif local_aqi < 300: color = "#FF9900"
-            elif local_aqi < 400: color = "#FF0000"
-            else: color = "#C00000"
-            results.append({"Ward": name, "Lat": meta['lat'], "Lon": meta['lon'], "Type": meta['type'], "AQI": local_aqi, "PM2.5": local_pm25, "NO2": local_no2, "Status": "Online ✅", "Cause": cause, "Color": color, "Impact": meta['pop_density']})
-        return pd.DataFrame(results)
-
-    def generate_historical_trends(self, ward_name):
-        ward_meta = WARDS.get(ward_name, WARDS["Raja Park"])
-        base_factor = ward_meta['risk_factor'] * 150
+        reg = self.registry
+        n = len(reg)
+
+        # Synthesis from the city baseline. Jitter and offline draws are kept until the baseline values
+        # change, so an unchanged upstream reading does not show up as a change in every ward.
+        key = tuple(sorted(baseline.items()))
+        if self._synthesis is None or self._synthesis[0] != key:
+            self._synthesis = (key, self.rng.uniform(0.9, 1.1, n), self.rng.random(n))
+        _, noise, offline_draw = self._synthesis
+        scale = reg.risk_factor * noise
+        aqi_mult = reg.type_values(AQI_TYPE_MULTIPLIER, 1.0)
+        aqi = baseline['aqi'] * scale * aqi_mult
+        pm25 = baseline['pm25'] * scale * aqi_mult
+        no2 = baseline['no2'] * scale * reg.type_values(NO2_TYPE_MULTIPLIER, 1.0)
+
+        # Real per-ward readings override synthesis; only synthesized sensors can drop offline
+        real = np.zeros(n, dtype=bool)
+        for name, r in readings.items():
+            i = reg.index[name]
+            real[i] = True
+            aqi[i], pm25[i], no2[i] = r['aqi'], r['pm25'], r['no2']
+        offline = ~real & (offline_draw < SENSOR_OFFLINE_RATE)
+
+        aqi = np.where(offline, 0, aqi).astype(np.int64)
+        pm25 = np.where(offline, 0, pm25).astype(np.int64)
+        no2 = np.where(offline, 0, no2).astype(np.int64)
+
+        ward_types = pd.Categorical.from_codes(reg.type_codes, categories=reg.type_categories)
+        cause = self.cause_rules.attribute(no2, pm25, ward_types, current_hour)
+        cause[offline] = "Sensor Error"
+        color = AQI_BAND_COLORS[np.digitize(aqi, AQI_BAND_EDGES)]
+        color[offline] = OFFLINE_COLOR
+        status = pd.Categorical.from_codes(offline.astype(np.int8), categories=STATUS_CATEGORIES)
+
+        df = pd.DataFrame({
+            "Ward": reg.names, "Lat": reg.lat, "Lon": reg.lon,
+            "Type": ward_types,
+            "AQI": aqi, "PM2.5": pm25, "NO2": no2,
+            "Status": status, "Cause": pd.Categorical(cause), "Color": color, "Impact": reg.pop_density
+        })
+        # Lets consumers (e.g. the map layer) cache derived artefacts per snapshot
+        df.attrs["version"] = next(self._grid_versions)
+        self.forecaster.update(df)
+        try:
+            with self.metrics.timer("step", step="snapshot_persist"):
+                self.store.append_snapshot(df)
+                self.forecaster.save()
+        except (OSError, ValueError) as e:   # unwritable or damaged store files must not take the grid down
+            self.metrics.inc("fallback_total", reason="snapshot_not_persisted")
+            log.warning(f"⚠️ Snapshot not persisted: {e}")
+        return df
+
+    def get_live_grid(self, per_ward=False):
+        """Cached grid snapshot: fresh within the TTL, then stale while one background refresh runs."""
+        return self.cache.get(("grid", per_ward), lambda: self.generate_live_data(per_ward))
+
+    def refresh_live_data(self, per_ward=False):
+        """
+        Grid built from newly fetched upstream readings (the snapshot feed's tick). It goes through
+        the grid cache, so get_live_grid callers arriving meanwhile share this refresh.
+        """
+        self.invalidate_grid()
+        return self.get_live_grid(per_ward)
+
+    def invalidate_grid(self):
+        """Drops only the grid snapshot and the readings it is built from; other caches are untouched."""
+        self.cache.invalidate(("grid", False), ("grid", True), "baseline", "ward_readings")
+
+    def generate_historical_trends(self, ward_name, hours=24, resolution="hour"):
+        """Stored readings for the last `hours`, rolled up to `resolution` ("raw", "hour" or "day")."""
+        history = self.store.query(ward_name, int(time.time()) - hours * 3600, resolution=resolution)
+        if not history.empty:
+            return history
+        return self._synthetic_trend(ward_name)
+
+    def forecast_all(self, hours=24):
+        """Hourly forecasts for every ward, recomputed only when a new snapshot has been folded in."""
+        key = (self.forecaster.version, hours)
+        if self._forecast_cache is None or self._forecast_cache[0] != key:
+            self._forecast_cache = (key, self.forecaster.forecast_frame(hours))
+        return self._forecast_cache[1]
+
+    def _synthetic_trend(self, ward_name):
+        # Placeholder profile until the store has collected readings for this ward
+        reg = self.registry
+        base_factor = reg.risk_factor[reg.index.get(ward_name, 0)] * 150
         hours = []; aqi_levels = []
-        current_time = datetime.now()
+        current_time = datetime.now(LOCAL_TZ)
         for i in range(24):
             time_point = current_time - timedelta(hours=i)
             hour_val = time_point.hour
             time_factor = 1.3 if (8 <= hour_val <= 11 or 18 <= hour_val <= 22) else 0.8
             simulated_aqi = int(base_factor * time_factor + random.randint(-10, 10))
-            hours.append(time_point.strftime("%H:00"))
+            hours.append(time_point.replace(minute=0, second=0, microsecond=0))
             aqi_levels.append(simulated_aqi)
         return pd.DataFrame({"Time": hours[::-1], "AQI": aqi_levels[::-1]})
 
-    def simulate_policy_impact(self, current_aqi, current_no2, ward_type, active_policies):
+    def simulate_policy_impact(self, current_aqi, current_no2, ward_type, active_policies, ward_name=None):
         predicted_aqi = current_aqi
         impact_data = []
         cost_data = []
         total_daily_cost = 0
 
-        policy_config = {
-            "odd_even": {"name": "Odd-Even Scheme", "reduction": 0.15, "target": ["Traffic Hub", "Commercial", "Market"], "base_cost": 15000, "manpower": 20, "unit_desc": "Deployment Teams"}, 
-            "construction_ban": {"name": "Construction Halt", "reduction": 0.20, "target": ["Residential", "Commercial"], "base_cost": 6500, "manpower": 4, "unit_desc": "Enforcement Squads"}, 
-            "factory_shutdown": {"name": "Factory Shutdown", "reduction": 0.35, "target": ["Industrial"], "base_cost": 8000, "manpower": 6, "unit_desc": "Inspection Teams"}, 
-            "smog_guns": {"name": "Anti-Smog Guns", "reduction": 0.08, "target": ["All"], "base_cost": 5000, "manpower": 2, "unit_desc": "Units Deployed"}, 
-            "ev_zone_only": {"name": "EV-Only Zone", "reduction": 0.25, "target": ["Traffic Hub", "Green Zone"], "base_cost": 4000, "manpower": 4, "unit_desc": "Checkpoints"}
-        }
-        scale_multiplier = 2 if ward_type in ["Industrial", "Traffic Hub"] else 1
+        policy_config = self.policy_table.config
+        scale_multiplier = 2 if ward_type in self.policy_table.scaled_types else 1
 
         for policy in active_policies:
             if policy in policy_config:
@@ -187,35 +768,241 @@ class PollutionEngine:
                     impact_data.append({"Strategy": rule["name"], "Effectiveness (α)": f"{int(rule['reduction']*100)}%", "Impact (Δ AQI)": f"-{drop}", "Confidence": "High"})
                     units = 1 * scale_multiplier
                     equipment_cost = rule["base_cost"] * units
-                    labor_cost = rule["manpower"] * 500 * units
+                    labor_cost = rule["manpower"] * self.policy_table.labour_rate * units
                     daily_total = equipment_cost + labor_cost
                     total_daily_cost += daily_total
                     cost_data.append({"Item Description": rule["name"], "Unit Type": rule["unit_desc"], "Units": units, "Equipment Cost (₹)": f"{equipment_cost:,}", "Manpower Cost (₹)": f"{labor_cost:,}", "Total Daily Cost (₹)": f"{daily_total:,}"})
                 else:
                     impact_data.append({"Strategy": rule["name"], "Effectiveness (α)": "0%", "Impact (Δ AQI)": "0", "Confidence": "N/A"})
 
-        predicted_aqi = max(predicted_aqi, 30)
-        forecast_data = [{"Day": "Day 1", "Predicted AQI": predicted_aqi}, {"Day": "Day 2", "Predicted AQI": int(predicted_aqi * 0.95)}, {"Day": "Day 3", "Predicted AQI": int(predicted_aqi * 0.92)}]
+        nominal_aqi = max(predicted_aqi, MIN_PREDICTED_AQI)
+        reductions, compliance = self.policy_table.scenario_arrays(ward_type, active_policies)
+        # The no-intervention trend comes from the fitted forecaster when the ward has history
+        baseline = self.forecaster.daily_ratios(ward_name, self.monte_carlo.horizon_days) if ward_name else None
+        forecast_df = self.monte_carlo.forecast_frame(current_aqi, reductions, compliance, baseline=baseline)
+        # The headline figure is the Day 1 median of the same simulation the curve is drawn from;
+        # the deterministic sum is kept as the nominal full-compliance value
+        predicted_aqi = int(forecast_df["Predicted AQI"].iloc[0])
+        if impact_data:
+            impact_data.append({"Strategy": "Nominal (full compliance)", "Effectiveness (α)": "-", "Impact (Δ AQI)": f"-{current_aqi - nominal_aqi}", "Confidence": "-"})
         
         if cost_data:
             cost_data.append({"Item Description": "<b>TOTAL PROJECTED BUDGET</b>", "Unit Type": "-", "Units": "-", "Equipment Cost (₹)": "-", "Manpower Cost (₹)": "-", "Total Daily Cost (₹)": f"<b>₹{total_daily_cost:,}</b>"})
 
-        return predicted_aqi, pd.DataFrame(impact_data), pd.DataFrame(forecast_data), pd.DataFrame(cost_data)
+        return predicted_aqi, pd.DataFrame(impact_data), forecast_df, pd.DataFrame(cost_data)
 
-    def generate_ai_budget_report(self, active_policies, ward_profile, estimated_cost):
+    def simulate_policy_grid(self, grid_df, policy_sets, seed=None):
+        """
+        Monte Carlo bands for every online ward × policy set. Large grids are spread over
+        the process pool. Returns one row per ward, package and day with P5/P50/P95.
+        """
+        online = grid_df[grid_df['AQI'] > 0]
+        scenarios, labels = [], []
+        for ward, aqi, ward_type in zip(online['Ward'], online['AQI'], online['Type'].astype(str)):
+            for policies in policy_sets:
+                reductions, compliance = self.policy_table.scenario_arrays(ward_type, policies)
+                scenarios.append((int(aqi), reductions, compliance))
+                labels.append((ward, " + ".join(policies) or "No Action"))
+        bands = self.monte_carlo.run(scenarios, seed=seed)                  # (N, days, 4)
+        n, days = bands.shape[0], bands.shape[1]
+        return pd.DataFrame({
+            "Ward": np.repeat([w for w, _ in labels], days),
+            "Package": np.repeat([p for _, p in labels], days),
+            "Day": np.tile(np.arange(1, days + 1), n),
+            "P5": bands[:, :, 0].ravel(),
+            "P50": bands[:, :, 1].ravel(),
+            "P95": bands[:, :, 2].ravel(),
+            "Mean": bands[:, :, 3].ravel(),
+        })
+
+    def optimize_policies(self, grid_df):
+        """
+        Evaluates every policy subset for every online ward in one vectorized pass.
+        Returns one row per (ward, applicable subset) with predicted AQI, daily cost,
+        cost per AQI point and whether the subset is on the ward's cost/AQI Pareto frontier.
+        """
+        table = self.policy_table
+        online = grid_df[grid_df['AQI'] > 0]
+        wards = online['Ward'].to_numpy(dtype=object)
+        aqi = online['AQI'].to_numpy(dtype=np.int64)
+        ward_types = online['Type'].astype(str).to_numpy(dtype=object)
+
+        applicable = table.applicability(ward_types)                               # (W, P)
+        drops = np.floor(aqi[:, None] * table.reduction).astype(np.int64) * applicable
+        costs = table.daily_cost * table.scale(ward_types)[:, None] * applicable
+        subsets = table.subsets.astype(np.int64)                                   # (S, P)
+        predicted = np.maximum(aqi[:, None] - drops @ subsets.T, MIN_PREDICTED_AQI)  # (W, S)
+        total_cost = costs @ subsets.T
+        improvement = aqi[:, None] - predicted
+        # A subset is only worth listing if every policy in it actually acts on the ward
+        valid = ~(table.subsets[None, :, :] & ~applicable[:, None, :]).any(axis=2)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cost_per_point = np.where(improvement > 0, total_cost / improvement, np.inf)
+
+        # Pareto frontier: walk subsets by ascending cost, keep those that beat every cheaper AQI
+        order = np.lexsort((predicted, np.where(valid, total_cost, np.inf)), axis=-1)
+        sorted_valid = np.take_along_axis(valid, order, axis=1)
+        sorted_pred = np.where(sorted_valid, np.take_along_axis(predicted, order, axis=1), np.inf)
+        best_so_far = np.minimum.accumulate(sorted_pred, axis=1)
+        previous_best = np.concatenate([np.full((len(aqi), 1), np.inf), best_so_far[:, :-1]], axis=1)
+        pareto = np.zeros_like(valid)
+        np.put_along_axis(pareto, order, sorted_valid & (sorted_pred < previous_best), axis=1)
+
+        n_subsets = len(table.subsets)
+        frame = pd.DataFrame({
+            "Ward": np.repeat(wards, n_subsets),
+            "Package": np.tile(table.subset_labels, len(wards)),
+            "Subset": np.tile(np.arange(n_subsets), len(wards)),
+            "Current AQI": np.repeat(aqi, n_subsets),
+            "Predicted AQI": predicted.ravel(),
+            "Daily Cost (₹)": total_cost.ravel(),
+            "Cost per AQI Point (₹)": cost_per_point.ravel(),
+            "Pareto": pareto.ravel(),
+        })
+        return frame[valid.ravel()].reset_index(drop=True)
+
+    def recommend_policy_packages(self, grid_df, target_aqi=POLICY_TARGET_AQI):
+        """
+        Cheapest Pareto package per ward that reaches target_aqi; wards that cannot reach it
+        get the package with the lowest predicted AQI instead, and wards already at or below
+        the target get "No Action" at no cost.
+        """
+        front = self.optimize_policies(grid_df)
+        front = front[front['Pareto'] & ((front['Subset'] > 0) | (front['Current AQI'] <= target_aqi))]
+        meets = front[front['Predicted AQI'] <= target_aqi]
+        best_meet = meets.loc[meets.groupby('Ward')['Daily Cost (₹)'].idxmin()]
+        rest = front[~front['Ward'].isin(best_meet['Ward'])]
+        best_rest = rest.loc[rest.groupby('Ward')['Predicted AQI'].idxmin()]
+        out = pd.concat([best_meet, best_rest], ignore_index=True)
+        out['Meets Target'] = out['Predicted AQI'] <= target_aqi
+        out['Policies'] = [self.policy_table.subset_keys[i] for i in out['Subset']]
+        return out.set_index('Ward')
+
+    def _budget_prompt(self, active_policies, ward_profile, estimated_cost):
         policy_list = ", ".join([p.replace('_', ' ').title() for p in active_policies])
-        prompt = f"Act as a Financial Auditor. Context: Ward: {ward_profile['Ward']} ({ward_profile['Type']}), Policies: {policy_list}, Estimated Cost: ₹{estimated_cost}. Task: Justify costs & suggest savings. Keep it concise."
-        return self._smart_generate(prompt, is_vision=False)
+        return f"Act as a Financial Auditor. Context: Ward: {ward_profile['Ward']} ({ward_profile['Type']}), Policies: {policy_list}, Estimated Cost: ₹{estimated_cost}. Task: Justify costs & suggest savings. Keep it concise."
 
-    def generate_segmented_report(self, ward_data, category, language="English"):
+    def generate_ai_budget_report(self, active_policies, ward_profile, estimated_cost):
+        return self._smart_generate(self._budget_prompt(active_policies, ward_profile, estimated_cost), is_vision=False)
+
+    def stream_ai_budget_report(self, active_policies, ward_profile, estimated_cost):
+        return self._smart_generate_stream(self._budget_prompt(active_policies, ward_profile, estimated_cost))
+
+    def _segmented_prompt(self, ward_data, category, language="English"):
         lang_instruction = "Translate response to Hindi (Devanagari script)." if language == "Hindi" else "Response in English."
         prompts = {
             "Industrial": f"Draft a strict legal show-cause notice for factories in {ward_data['Ward']} (Type: {ward_data['Type']}, AQI: {ward_data['AQI']}). Cite relevant Indian Environmental Protection Acts. {lang_instruction}",
             "Public": f"Write a clear, urgent health advisory for citizens in {ward_data['Ward']} regarding high PM2.5 levels. Recommend specific masks (N95) and outdoor timings. {lang_instruction}",
             "Traffic": f"Create a tactical deployment plan for Traffic Police in {ward_data['Ward']}. Focus on choke points, vehicle checks, and diverting heavy diesel trucks. {lang_instruction}"
         }
-        return self._smart_generate(prompts.get(category, prompts["Public"]), is_vision=False)
+        return prompts.get(category, prompts["Public"])
 
-    def analyze_uploaded_image(self, image):
+    def generate_segmented_report(self, ward_data, category, language="English"):
+        return self._smart_generate(self._segmented_prompt(ward_data, category, language), is_vision=False)
+
+    def stream_segmented_report(self, ward_data, category, language="English"):
+        return self._smart_generate_stream(self._segmented_prompt(ward_data, category, language))
+
+    def draft_reports_parallel(self, ward_data, categories=REPORT_CATEGORIES, languages=REPORT_LANGUAGES):
+        """Drafts every category × language on the bounded Gemini pool. Returns {(category, language): text}."""
+        futures = {
+            (cat, lang): self._llm_pool.submit(self.generate_segmented_report, ward_data, cat, lang)
+            for cat in categories for lang in languages
+        }
+        return {k: f.result() for k, f in futures.items()}
+
+    def _imaging(self):
+        # PIL-based pipeline is imported on first Citizen Eye use to keep it off the cold start path
+        import imaging
+        if self._image_dedup is None:
+            self._image_dedup = imaging.NearDuplicateIndex()
+        return imaging
+
+    def _analyze_prepared(self, prepared):
         prompt = "Analyze this image for environmental pollution. 1. Identify source. 2. Estimate Severity. 3. Recommend action."
-        return self._smart_generate(prompt, is_vision=True, image=image)
\ No newline at end of file
+        self.metrics.observe("image_upload_bytes", len(prepared["bytes"]), SIZE_BUCKETS)
+        previous = self._image_dedup.find(prepared["phash"])
+        self.metrics.inc("cache_total", cache="image_dedup", result="miss" if previous is None else "hit")
+        if previous is not None:
+            analysis, duplicate = previous, True
+        else:
+            analysis, duplicate = self._smart_generate(prompt, is_vision=True, image=prepared["image"]), False
+            if not analysis.startswith("⚠️"):
+                self._image_dedup.add(prepared["phash"], analysis)
+        report = {"Analysis": analysis, "Duplicate": duplicate, "GPS": prepared["gps"], "Upload KB": round(len(prepared["bytes"]) / 1024, 1)}
+        if prepared["gps"]:
+            report["Route"] = self.route_citizen_report(*prepared["gps"])
+        return report
+
+    def analyze_citizen_report(self, image):
+        """
+        Downsized, EXIF-stripped vision analysis. Near-duplicates of a recent photo reuse its
+        analysis; GPS (if present) routes the report to the nearest ward's officer.
+        """
+        imaging = self._imaging()
+        return self._analyze_prepared(imaging.preprocess_image(image))
+
+    def analyze_uploaded_image(self, image):
+        return self.analyze_citizen_report(image)["Analysis"]
+
+    def analyze_images_batch(self, images):
+        """
+        Preprocesses a burst of images on the bounded pool, analyses one representative per
+        group of near-duplicates and copies its result to the rest.
+        """
+        imaging = self._imaging()
+        prepared = list(self._llm_pool.map(imaging.preprocess_image, images))
+        in_batch = imaging.NearDuplicateIndex()
+        representative = []
+        for i, p in enumerate(prepared):
+            j = in_batch.find(p["phash"])
+            if j is None:
+                in_batch.add(p["phash"], i)
+                j = i
+            representative.append(j)
+        futures = {i: self._llm_pool.submit(self._analyze_prepared, prepared[i]) for i in sorted(set(representative))}
+        reports = []
+        for i, p in enumerate(prepared):
+            rep = futures[representative[i]].result()
+            report = {"Analysis": rep["Analysis"], "Duplicate": rep["Duplicate"] or representative[i] != i,
+                      "GPS": p["gps"], "Upload KB": round(len(p["bytes"]) / 1024, 1)}
+            if p["gps"]:
+                report["Route"] = self.route_citizen_report(*p["gps"])
+            reports.append(report)
+        return reports
+
+    def analyze_folder(self, path):
+        named = self._imaging().load_folder(path)
+        reports = self.analyze_images_batch([img for _, img in named])
+        for (name, _), report in zip(named, reports):
+            report["File"] = name
+        return reports
+
+
+class CityHub:
+    """
+    One engine per configured city in a single process. Engines share the HTTP pool, Gemini client,
+    LLM cache and Monte Carlo pool; each keeps its own grid cache, store and forecaster, so cities
+    refresh concurrently and switching city never reloads another city's data.
+    """
+    def __init__(self, owm_key, gemini_key, vision_key=None, grid_ttl=GRID_TTL_SECONDS, cities=None, **engine_kwargs):
+        self.cities = cities if cities is not None else CITIES
+        first, *rest = self.cities
+        root = PollutionEngine(owm_key, gemini_key, vision_key, grid_ttl, city=self.cities[first], **engine_kwargs)
+        self.engines = {first: root}
+        for city_id in rest:
+            self.engines[city_id] = root.for_city(self.cities[city_id])
+        self.feeds = {}
+
+    def __getitem__(self, city_id):
+        return self.engines[city_id]
+
+    def __iter__(self):
+        return iter(self.engines)
+
+    def start_feeds(self, interval=None, per_ward=False):
+        """One background SnapshotFeed per city (default interval: the grid TTL); each refreshes on its own thread."""
+        for city_id, e in self.engines.items():
+            if city_id not in self.feeds:
+                self.feeds[city_id] = SnapshotFeed(e, interval or e.grid_ttl, per_ward).start()
+        return self.feeds